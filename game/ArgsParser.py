@@ -1,5 +1,22 @@
-from Settings import CELL_SIZE, WIDTH, HEIGHT, FPS, START_GENS_PER_SEC
-from argparse import ArgumentParser
+from Settings import CELL_SIZE, WIDTH, HEIGHT, FPS, START_GENS_PER_SEC, ENGINE, DIRTY_RECTS, \
+    GENERATIONS, PARALLEL_WORKERS, UNIVERSE, TURBO, BACKGROUND, \
+    AUTO_PAUSE, BENCHMARK_TOLERANCE, HISTORY_BUDGET, OUT_OF_CORE_BAND, SOUP_BATCH, \
+    RECORD_STRIDE, RECORD_DROP, HEADLESS_RECORD_DROP
+from Engine import ENGINES
+from argparse import ArgumentParser, ArgumentTypeError
+
+
+def universe_size(text: str) -> (int, int):
+    """
+    Converts the 'WxH' argument into the tuple (W, H)
+    """
+    try:
+        width, height = map(int, text.lower().split('x'))
+    except ValueError:
+        raise ArgumentTypeError(f"size of the universe has to be in the form WxH, not '{text}'")
+    if width < 1 or height < 1:
+        raise ArgumentTypeError(f"size of the universe has to be positive, not '{text}'")
+    return width, height
 
 
 class ArgsParser:
@@ -21,7 +38,106 @@ class ArgsParser:
                          help='startup screen height, must be greater than MIN_HEIGHT',
                          required=False)
         par.add_argument('-F', '--file', metavar='PATH', type=str, default=None,
-                         help='relative path from __main__ to the folder with the file,  ex. ../patterns/glider.txt',
+                         help='relative path from __main__ to the pattern file (plaintext, .rle, .lif or .bin), '
+                              'ex. ../patterns/glider.txt',
+                         required=False)
+        par.add_argument('-U', '--universe', metavar='WxH', type=universe_size, default=UNIVERSE,
+                         help='size of the universe (independent of the window), ex. 4000x4000',
+                         required=False)
+        par.add_argument('-e', '--engine', type=str, default=ENGINE, choices=ENGINES,
+                         help='engine used to compute the next generations',
+                         required=False)
+        par.add_argument('-w', '--workers', metavar='INT', type=int, default=PARALLEL_WORKERS,
+                         help='number of processes used by the parallel engine',
+                         required=False)
+        par.add_argument('-d', '--dirty', action='store_true', default=DIRTY_RECTS,
+                         help='change tracking mode - update only the regions of the screen that have changed',
+                         required=False)
+        par.add_argument('-u', '--turbo', action='store_true', default=TURBO,
+                         help='start in the turbo mode - compute as many generations as fit into every frame',
+                         required=False)
+        par.add_argument('-b', '--background', action='store_true', default=BACKGROUND,
+                         help='compute the generations in the background thread, independently of the rendering',
+                         required=False)
+        par.add_argument('-a', '--autopause', action='store_true', default=AUTO_PAUSE,
+                         help='pause the game when the board has stabilized (still lifes and oscillators)',
+                         required=False)
+        par.add_argument('-P', '--profile', metavar='PATH', type=str, default=None,
+                         help='measure the phases of every frame and write the timings to the file (.json or .csv)',
+                         required=False)
+        par.add_argument('-R', '--history', metavar='MB', type=float, default=HISTORY_BUDGET / (1 << 20),
+                         help='memory budget of the history of the boards used for the rewind (0 disables it)',
+                         required=False)
+        par.add_argument('--record', metavar='PATH', type=str, default=None,
+                         help='record the generations - animated GIF (.gif) or the directory of the PNG files, also in '
+                              'the headless mode',
+                         required=False)
+        par.add_argument('--stride', metavar='INT', type=int, default=RECORD_STRIDE,
+                         help='recording - every stride-th generation is recorded',
+                         required=False)
+        par.add_argument('--backpressure', action='store_const', const=True, default=None,
+                         help='recording - wait for the writer when its queue is full instead of dropping the frames '
+                              '(default in the headless mode)',
+                         required=False)
+        par.add_argument('--drop-frames', dest='backpressure', action='store_const', const=False,
+                         help='recording - drop the frames when the queue of the writer is full '
+                              '(default in the window)',
+                         required=False)
+        par.add_argument('--headless', action='store_true',
+                         help='run without the window as fast as possible and report the performance',
+                         required=False)
+        par.add_argument('-n', '--generations', metavar='INT', type=int, default=GENERATIONS,
+                         help='number of generations computed in the headless mode',
+                         required=False)
+        par.add_argument('--seed', metavar='INT', type=int, default=None,
+                         help='seed of the random grid in the headless mode',
+                         required=False)
+        par.add_argument('--stats', metavar='PATH', type=str, default=None,
+                         help='headless mode - write the statistics of every generation to the CSV file',
+                         required=False)
+        par.add_argument('-o', '--output', metavar='PATH', type=str, default=None,
+                         help='headless mode - save the last board to the file (.rle, .lif, .bin or plaintext)',
+                         required=False)
+        par.add_argument('--cycles', action='store_true',
+                         help='headless mode - detect the cycles, skip the generations once the board has stabilized',
+                         required=False)
+        par.add_argument('--out-of-core', metavar='PATH', type=str, default=None,
+                         help='compute the generations of the board in the binary file mapped into the memory by the '
+                              'bands of rows (created from the -F pattern or the random soup of the -U size)',
+                         required=False)
+        par.add_argument('--band', metavar='MB', type=float, default=OUT_OF_CORE_BAND / (1 << 20),
+                         help='out-of-core mode - size of the band of the packed rows computed at once',
+                         required=False)
+        par.add_argument('--snapshots', metavar='INT', type=int, default=0,
+                         help='out-of-core mode - copy the board file every that many generations',
+                         required=False)
+        par.add_argument('--soups', metavar='INT', type=int, default=None,
+                         help='screen that many random boards (seeds from --seed) for the long-lived ones, at most -n '
+                              'generations each',
+                         required=False)
+        par.add_argument('--batch', metavar='INT', type=int, default=SOUP_BATCH,
+                         help='soup search - number of the boards stepped together in one process',
+                         required=False)
+        par.add_argument('--benchmark', action='store_true',
+                         help='run every bundled pattern and the random soups with every engine, check the results and '
+                              'measure the throughput',
+                         required=False)
+        par.add_argument('--baseline', metavar='PATH', type=str, default=None,
+                         help='benchmark - JSON file with the stored throughputs, the run fails when they regress '
+                              '(the file is created when it does not exist)',
+                         required=False)
+        par.add_argument('--update-baseline', action='store_true',
+                         help='benchmark - overwrite the baseline with the results of this run',
+                         required=False)
+        par.add_argument('--tolerance', metavar='PCT', type=float, default=BENCHMARK_TOLERANCE,
+                         help='benchmark - allowed slow-down against the baseline (%%)',
+                         required=False)
+        par.add_argument('--startup', action='store_true',
+                         help='headless mode - measure the latency of the startup and resize of the window (with the '
+                              'dummy video driver)',
+                         required=False)
+        par.add_argument('--scale', action='store_true',
+                         help='headless mode - measure the speed-up of the parallel engine from 1 to WORKERS processes',
                          required=False)
         args = vars(par.parse_args())
         self.size = args['size']
@@ -30,3 +146,33 @@ class ArgsParser:
         self.width = args['width']
         self.height = args['height']
         self.file = args['file']
+        self.universe = args['universe']
+        self.engine = args['engine']
+        self.workers = args['workers']
+        self.dirty = args['dirty']
+        self.turbo = args['turbo']
+        self.background = args['background']
+        self.autopause = args['autopause']
+        self.profile = args['profile']
+        self.history = int(args['history'] * (1 << 20))
+        self.record = args['record']
+        self.stride = args['stride']
+        self.backpressure = args['backpressure'] if args['backpressure'] is not None else \
+            not (HEADLESS_RECORD_DROP if args['headless'] else RECORD_DROP)
+        self.headless = args['headless']
+        self.generations = args['generations']
+        self.seed = args['seed']
+        self.stats = args['stats']
+        self.output = args['output']
+        self.cycles = args['cycles']
+        self.out_of_core = args['out_of_core']
+        self.band = int(args['band'] * (1 << 20))
+        self.snapshots = args['snapshots']
+        self.soups = args['soups']
+        self.batch = args['batch']
+        self.benchmark = args['benchmark']
+        self.baseline = args['baseline']
+        self.update_baseline = args['update_baseline']
+        self.startup = args['startup']
+        self.tolerance = args['tolerance']
+        self.scale = args['scale']
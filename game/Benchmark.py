@@ -0,0 +1,156 @@
+from Settings import *
+from Engine import create_engine, ENGINES
+from Patterns import read_pattern, place_pattern
+from time import perf_counter
+import json
+import gc
+
+
+class Benchmark:
+    def __init__(self, generations: int = BENCHMARK_GENERATIONS, sizes: tuple = BENCHMARK_SIZES, seed: int = 0,
+                 baseline: str = None, update_baseline: bool = False, tolerance: float = BENCHMARK_TOLERANCE,
+                 workers: int = PARALLEL_WORKERS):
+        """
+        Runs every bundled pattern (PATTERNS and SAVES) and the random soups of the given sizes with every engine,
+        checks that the engines give the same result as the reference engine and measures the throughput
+        :param generations: number of generations computed in every case
+        :param sizes: sizes of the square grids of the random soups
+        :param seed: seed of the random soups
+        :param baseline: path to the JSON file with the stored throughputs - the run fails when any of them regresses
+        by more than the tolerance, the file is created when it does not exist
+        :param update_baseline: overwrite the baseline with the results of this run
+        :param tolerance: allowed slow-down against the baseline (%)
+        :param workers: number of processes used by the parallel engine
+        """
+        self.generations = generations
+        self.baseline = baseline
+        self.update_baseline = update_baseline
+        self.tolerance = tolerance
+        self.workers = workers
+        self.toroidal = {name: create_engine(name).toroidal for name in ENGINES}
+        self.cases = {}  # name of the case -> board
+        for folder in (PATTERNS, SAVES):
+            for file in sorted(Path(folder).glob('*')):
+                pattern = read_pattern(str(file))
+                width, height = pattern.shape
+                self.cases[file.stem] = place_pattern(pattern, max(width + BENCHMARK_MARGIN, BENCHMARK_MIN_GRID),
+                                                      max(height + BENCHMARK_MARGIN, BENCHMARK_MIN_GRID))
+        rng = np.random.default_rng(seed)
+        for size in sizes:
+            self.cases[f'soup_{size}'] = rng.integers(0, 2, (size, size), dtype=np.uint8)
+
+    def board(self, case: str, name: str) -> np.ndarray:
+        """
+        Returns the board of the case computed by the engine - the engines which compute on the unbounded plane get the
+        board padded by the generations of dead cells on every side, so the pattern can't reach the edges and the
+        result is the same as on the torus
+        """
+        board = self.cases[case]
+        return board if self.toroidal[name] else np.pad(board, self.generations)
+
+    def measure(self, name: str, board: np.ndarray) -> (np.ndarray, float):
+        """
+        Computes the generations in up to BENCHMARK_REPEATS runs (fewer, when they take more than BENCHMARK_MAX_TIME),
+        every run repeats the computation until it takes at least BENCHMARK_MIN_TIME, so the short cases are not
+        dominated by the noise of the timer. Every computation uses a new instance of the engine (so the caches of the
+        engine are cold), only the parallel engine (which has no caches) is kept for the whole run. The engine is
+        warmed up with zero generations first (starts the pool of processes) and the garbage collector is disabled while
+        the computation is timed (as in timeit).
+        :param name: name of the engine
+        :param board: uint8 array [x][y]
+        :return: (the last board, the median time of one computation in seconds)
+        """
+        times, total = [], 0.0
+        while len(times) < BENCHMARK_REPEATS and total <= BENCHMARK_MAX_TIME:
+            engine, elapsed, count = None, 0.0, 0
+            while elapsed < BENCHMARK_MIN_TIME or not count:
+                if engine is None or not engine.parallel:
+                    engine = create_engine(name, self.workers)
+                    engine.step(board, 0)
+                gc.collect()
+                gc.disable()
+                start = perf_counter()
+                result = engine.step(board, self.generations)
+                elapsed += perf_counter() - start
+                gc.enable()
+                count += 1
+            engine.parallel and engine.close()
+            times.append(elapsed / count)
+            total += elapsed
+        return result, float(np.median(times))
+
+    def run(self) -> list:
+        """
+        Runs all the cases, prints the table of the results and compares them with the baseline
+        :return: list of the results - dictionaries with the keys case, engine, gens_per_sec, cells_per_sec and check
+        """
+        results = []
+        print(f"{'case':<28}{'engine':<12}{'gens/sec':>12}{'cells/sec':>14}  check")
+        for case in self.cases:
+            # the reference engine (and the HashLife engine on the padded board) is too slow for the big cases, then
+            # the numpy engine (checked on the small ones) gives the expected result
+            small = self.cases[case].size * self.generations <= BENCHMARK_REFERENCE_CELLS
+            reference = 'reference' if small else 'numpy'  # it is measured first
+            for name in sorted(ENGINES, key=lambda engine: engine != reference):
+                if not small and (name == 'reference' or not self.toroidal[name]):
+                    continue
+                board = self.board(case, name)
+                result, elapsed = self.measure(name, board)
+                expected = result if name == reference else expected
+                if name == reference:
+                    check = 'reference'
+                elif self.toroidal[name]:
+                    check = 'ok' if np.array_equal(result, expected) else 'MISMATCH'
+                else:
+                    # the padded board - the numpy engine computes the same on it as on the plane
+                    check = 'ok' if np.array_equal(result, create_engine('numpy').step(board, self.generations)) \
+                        else 'MISMATCH'
+                results.append({'case': case, 'engine': name,
+                                'gens_per_sec': self.generations / elapsed,
+                                'cells_per_sec': self.generations * board.size / elapsed,
+                                'check': check})
+                print(f"{case:<28}{name:<12}{results[-1]['gens_per_sec']:>12.1f}"
+                      f"{results[-1]['cells_per_sec']:>14.0f}  {check}")
+
+        mismatches = [f"{r['case']}/{r['engine']}" for r in results if r['check'] == 'MISMATCH']
+        mismatches and quit(f"Engines differ from the reference: {', '.join(mismatches)}")
+        self.baseline and self.compare(results)
+        return results
+
+    def compare(self, results: list):
+        """
+        Compares the throughputs with the baseline file (or stores them when there is no baseline yet) - the cases
+        computed faster than BENCHMARK_FLOOR both in the baseline and now are skipped and the regressed cases are
+        measured again, so only the regression which repeats fails the run
+        :param results: results returned by the run
+        """
+        throughputs = {f"{r['case']}/{r['engine']}": r['gens_per_sec'] for r in results}
+        if self.update_baseline or not Path(self.baseline).exists():
+            with open(self.baseline, 'w') as f:
+                json.dump({'generations': self.generations, 'gens_per_sec': throughputs}, f, indent=2)
+            print(f"Baseline saved to '{self.baseline}'")
+            return
+
+        with open(self.baseline) as f:
+            baseline = json.load(f)
+        if baseline['generations'] != self.generations:
+            quit(f"The baseline was measured with {baseline['generations']} generations, not {self.generations}")
+        regressions, skipped = [], 0
+        floor = self.generations / BENCHMARK_FLOOR  # throughput of the computation which takes BENCHMARK_FLOOR
+        for key, expected in baseline['gens_per_sec'].items():
+            measured = throughputs.get(key)
+            limit = expected * (1 - self.tolerance / 100)
+            if measured is None:
+                continue
+            if min(measured, expected) > floor:  # a case which got slower than the floor (or faster) is compared
+                skipped += 1
+                continue
+            if measured < limit:
+                case, name = key.rsplit('/', 1)
+                measured = max(measured, self.generations / self.measure(name, self.board(case, name))[1])
+            if measured < limit:
+                regressions.append(f'{key}: {measured:.1f} gens/sec ({(measured / expected - 1) * 100:+.1f}%)')
+        if regressions:
+            quit(f"Regressions by more than {self.tolerance}% against '{self.baseline}':\n" + '\n'.join(regressions))
+        print(f"No regressions by more than {self.tolerance}% against '{self.baseline}' "
+              f"({skipped} cases faster than {BENCHMARK_FLOOR * 1000:g} ms in both runs skipped)")
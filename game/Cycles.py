@@ -0,0 +1,64 @@
+from Settings import np, CYCLE_HISTORY
+from collections import deque
+
+
+def zobrist_keys(indices: np.ndarray) -> np.ndarray:
+    """
+    Returns the random keys of the cells - the key of the cell is the splitmix64 of its flat index, so no table of
+    keys is needed
+    :param indices: flat indices of the cells (x * height + y)
+    :return: uint64 array
+    """
+    z = (np.asarray(indices, dtype=np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def zobrist(indices: np.ndarray) -> int:
+    """
+    Returns the XOR of the keys of the cells, so the hash of the board can be updated only by the cells which changed
+    their state
+    :param indices: flat indices of the cells (x * height + y)
+    :return: 64 bit hash
+    """
+    return int(np.bitwise_xor.reduce(zobrist_keys(indices), initial=np.uint64(0)))
+
+
+class CycleDetector:
+    """
+    Remembers the hashes of the last generations and finds the first one which repeats - then the board has
+    stabilized (period 1 for the still lifes). When more generations were computed at once, the period found is a
+    multiple of the real period.
+    """
+
+    def __init__(self, history: int = CYCLE_HISTORY):
+        """
+        :param history: number of the last generations remembered - the longest period which can be detected
+        """
+        self.history = history
+        self.seen = {}  # hash -> generation
+        self.order = deque()
+        self.stabilized = self.period = None  # the first generation of the cycle and its length
+
+    def reset(self):
+        self.seen.clear()
+        self.order.clear()
+        self.stabilized = self.period = None
+
+    def add(self, generation: int, board_hash: int) -> bool:
+        """
+        Adds the hash of the generation
+        :return: True when the cycle was found just now
+        """
+        if self.period is not None:
+            return False
+        previous = self.seen.get(board_hash)
+        if previous is not None and previous != generation:
+            self.stabilized, self.period = previous, generation - previous
+            return True
+        self.seen[board_hash] = generation
+        self.order.append(board_hash)
+        if len(self.order) > self.history:
+            del self.seen[self.order.popleft()]
+        return False
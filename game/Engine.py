@@ -0,0 +1,120 @@
+import numpy as np
+from importlib import import_module
+
+# name of the engine: 'module.class' - engines are imported only when they are requested
+ENGINES = {'numpy': 'Engine.NumpyEngine',
+           'reference': 'Engine.ReferenceEngine',
+           'hashlife': 'HashLife.HashLifeEngine',
+           'sparse': 'Sparse.SparseEngine',
+           'bitpacked': 'BitPacked.BitPackedEngine',
+           'parallel': 'Parallel.ParallelEngine',
+           'lut': 'Lookup.LookupEngine'}
+
+
+def create_engine(name: str, workers: int = None):
+    """
+    Creates an instance of the engine registered under the given name
+    :param name: one of the keys of ENGINES
+    :param workers: number of processes used by the parallel engines (ignored by the others), None means default
+    :return: instance of the Engine subclass
+    """
+    try:
+        module, cls = ENGINES[name].rsplit('.', 1)
+    except KeyError:
+        quit(f"Unknown engine '{name}', available: {', '.join(ENGINES)}")
+    cls = getattr(import_module(module), cls)
+    return cls(workers) if cls.parallel and workers else cls()
+
+
+class Engine:
+    """
+    Base class of all the stepping engines.
+    The universe is a numpy uint8 array indexed [x][y] (the same layout as the old list of cells), where 1 means alive
+    and 0 means dead. All edges of the array are stitched together (toroidal array).
+    """
+    name = None
+    toroidal = True  # False when the engine treats the board as a part of an unbounded plane
+    parallel = False  # True when the engine uses a pool of worker processes
+
+    def step(self, board: np.ndarray, generations: int = 1) -> np.ndarray:
+        """
+        Computes the state of the board after the given number of generations
+        :param board: uint8 array [x][y] - it is not modified
+        :param generations: number of generations to compute
+        :return: new uint8 array [x][y]
+        """
+        for _ in range(generations):
+            board = self.next_generation(board)
+        return board
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        """
+        Computes the next generation of the board
+        :param board: uint8 array [x][y] - it is not modified
+        :return: new uint8 array [x][y]
+        """
+        raise NotImplementedError
+
+    def touch(self, x: int, y: int):
+        """
+        Called when the state of the cell was changed outside of the engine (on the board returned by the step)
+        :param x: The index of the changed cell
+        :param y: The index of the changed cell
+        """
+
+
+class ReferenceEngine(Engine):
+    """
+    The original per-cell loop, slow but simple - other engines are checked against it
+    """
+    name = 'reference'
+
+    @staticmethod
+    def count_cell_neighbors(cells: list, x: int, y: int, grid_width: int, grid_height: int) -> int:
+        """
+        Get the number of alive neighbors of the specific cell
+        :param cells: list of lists [x][y] with the states of the cells
+        :param x: The index of the specific cell
+        :param y: The index of the specific cell
+        :param grid_width: number of columns
+        :param grid_height: number of rows
+        :return: The number of alive neighbors of that cell
+        """
+        prev_x = x - 1
+        prev_y = y - 1
+        next_x = (x + 1) % grid_width
+        next_y = (y + 1) % grid_height
+        return cells[prev_x][prev_y] + cells[prev_x][y] + cells[prev_x][next_y] + \
+               cells[x][prev_y] + cells[x][next_y] + \
+               cells[next_x][prev_y] + cells[next_x][y] + cells[next_x][next_y]
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        grid_width, grid_height = board.shape
+        cells = board.tolist()
+        temp = []
+        for x in range(grid_width):
+            temp.append([])
+            for y in range(grid_height):
+                state = cells[x][y]
+                neighbors = self.count_cell_neighbors(cells, x, y, grid_width, grid_height)
+                if state == 0 and neighbors == 3:
+                    temp[x].append(1)
+                elif state == 1 and neighbors < 2 or neighbors > 3:
+                    temp[x].append(0)
+                else:
+                    temp[x].append(state)
+        return np.array(temp, dtype=np.uint8).reshape(board.shape)
+
+
+class NumpyEngine(Engine):
+    """
+    Vectorized engine - neighbors are counted with the rolled copies of the whole board. The board is given by its
+    last two axes, so the stack of boards [board][x][y] is computed at once as well.
+    """
+    name = 'numpy'
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        # sum of each column with its left and right neighbor, then the same for the rows (wraps around the edges)
+        cols = board + np.roll(board, 1, axis=-2) + np.roll(board, -1, axis=-2)
+        neighbors = cols + np.roll(cols, 1, axis=-1) + np.roll(cols, -1, axis=-1) - board
+        return ((neighbors == 3) | (board & (neighbors == 2))).astype(np.uint8)
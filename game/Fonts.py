@@ -0,0 +1,41 @@
+from Settings import pg, FONT_CACHE_SIZE
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def font_file(name: str) -> str:
+    """
+    Returns the path to the system font - the system font lookup is slow, so it is done only once for every name
+    :return: path to the file or None (the default font of pygame)
+    """
+    return pg.font.match_font(name)
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def font(name: str, size: int) -> pg.font.Font:
+    """
+    Returns the font of the given size loaded from the cached font file (the same object for the same arguments)
+    """
+    return pg.font.Font(font_file(name), size)
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def fit_font_size(name: str, text: str, max_width: float, max_height: float, max_size: int) -> int:
+    """
+    Returns the biggest size of the font in which the text is narrower than max_width and lower than max_height - the
+    size is found by the binary search and remembered for the given bounds (the size of the window)
+    :param name: name of the system font
+    :param text: text which has to fit
+    :param max_width: the width of the text has to be smaller (px)
+    :param max_height: the height of the text has to be smaller (px)
+    :param max_size: the biggest size tried
+    """
+    def fits(size: int) -> bool:
+        width, height = font(name, size).size(text)
+        return width < max_width and height < max_height
+
+    low, high = 1, max(1, int(max_size))  # the smallest font is used even if it does not fit
+    while low < high:
+        middle = (low + high + 1) // 2
+        low, high = (middle, high) if fits(middle) else (low, middle - 1)
+    return low
@@ -1,10 +1,24 @@
 from Settings import *
-from Cell import Cell
+from Engine import create_engine
+from Renderer import Renderer
+from Scheduler import Scheduler, BackgroundScheduler
+from Stats import Stats
+from TextCache import TextCache
+from Fonts import font, fit_font_size
+from Profiler import Profiler
+from History import History
+from Recorder import Recorder
+from Patterns import read_pattern, write_pattern, place_pattern, fit_pattern
+from threading import Thread
 
 
 class GameOfLife:
     def __init__(self, cell_size: int = CELL_SIZE, fps: int = FPS, gens_per_sec: int = START_GENS_PER_SEC,
-                 width: int = WIDTH, height: int = HEIGHT, file: str = None):
+                 width: int = WIDTH, height: int = HEIGHT, file: str = None, universe: (int, int) = UNIVERSE,
+                 engine: str = ENGINE, dirty: bool = DIRTY_RECTS, workers: int = PARALLEL_WORKERS, turbo: bool = TURBO,
+                 background: bool = BACKGROUND, auto_pause: bool = AUTO_PAUSE, profile_file: str = None,
+                 history: int = HISTORY_BUDGET, record: str = None, stride: int = RECORD_STRIDE,
+                 backpressure: bool = not RECORD_DROP):
         """
         :param cell_size: Length of the side of a square cell (px)
         :param fps: Framerate cap
@@ -13,6 +27,22 @@ class GameOfLife:
         passing argument through cmd/ or it would be the value of WIDTH set in Settings
         :param height: Screen height - (has to be greater than MIN_HEIGHT if set by constructor /when creating an
         instance or passing argument through cmd/ or it would be the value of HEIGHT set in Settings
+        :param file: path to the pattern file or None
+        :param universe: size of the universe (columns, rows), None means the number of cells which fit into the
+        startup window. The window shows only the part of the universe visible through the camera.
+        :param engine: name of the engine used to compute the next generations (one of the keys of Engine.ENGINES)
+        :param dirty: change tracking mode - only the regions of the changed cells are updated on the screen and the
+        frame is not redrawn at all when nothing has changed
+        :param workers: number of processes used by the parallel engine
+        :param turbo: turbo mode - as many generations as fit into every frame are computed (gens_per_sec is ignored)
+        :param background: the generations are computed in the background thread and the finished boards are handed
+        to the renderer, so the slow steps don't drop the frame rate
+        :param auto_pause: pause the game when the board has stabilized (still lifes and oscillators only)
+        :param profile_file: the phases of every frame are measured and the timings are written to the file on exit
+        :param history: memory budget of the history of the shown boards used for the rewind (bytes), 0 disables it
+        :param record: record the generations from the start - path to the GIF file or the directory of the PNG files
+        :param stride: every stride-th generation is recorded
+        :param backpressure: wait for the writer of the recording when its queue is full instead of dropping the frames
         """
         pg.init()
         pg.display.set_icon(pg.image.load(ICON))
@@ -26,112 +56,123 @@ class GameOfLife:
         self.height = HEIGHT if height == 0 else height if height > MIN_HEIGHT else MIN_HEIGHT
         self.screen = pg.display.set_mode([self.width, self.height], HWSURFACE | DOUBLEBUF | RESIZABLE)
         self.clock = pg.time.Clock()
-        self.new_gen_event = pg.USEREVENT + 1
-        pg.time.set_timer(self.new_gen_event, int(1000 / self.gens_per_sec))
         self.dead_color = next(DEAD_COLOR)
         self.grid_color = next(GRID_COLOR)
-        self.sprites = self.grid_width = self.grid_height = self.margin_x = self.grid_image = self.cells = \
+        self.engine = create_engine(engine, workers)
+        self.jump_engine = None  # used only by the thread of the jump (not shared with the scheduler)
+        self.jump_exponent = JUMP_EXPONENT
+        self.jump = None  # (thread, generation, board, generations, result) of the jump computed in the background
+        self.scheduler = (BackgroundScheduler if background else Scheduler)(self.engine, self.gens_per_sec, self.fps,
+                                                                            turbo)
+        self.board = None
+        self.renderer = Renderer()
+        self.stats = Stats()
+        self.history = History(history) if history > 0 else None
+        self.stride, self.backpressure = stride, backpressure
+        self.recorder = None
+        self.dirty = dirty
+        self.redraw = True
+        self.changed = self.drawn_menu = self.drawn_info = None
+        self.marked = False  # the changed mask holds the changes not drawn yet (otherwise it is stale)
+        self.universe = universe
+        self.camera_x = self.camera_y = self.view_width = self.view_height = 0
+        self.grid_width = self.grid_height = self.margin_x = self.grid_image = \
             self.generation = self.font_info = self.font_help = self.grid_lines = None
-        self.f1_menu_width = self.f1_line_height = 0
+        self.f1_menu_width = self.f1_line_height = self.help_size = 0
+        self.info_text = self.help_text = self.menu_surface = self.menu_key = None
         self.show_route = False
         self.show_menu = True
         self.paused = True
+        self.auto_pause = auto_pause
+        self.profile_file = profile_file
+        self.profiler = Profiler(enabled=bool(profile_file))
+        self.show_profile = False
+        self.font_profile = self.profile_text = self.profile_surface = self.profile_key = None
         self.calculate_font_sizes()
         file and self.load_from_file(file)
         self.new(file=file)
+        record and self.start_recording(record)
 
     def load_from_file(self, file: str):
         """
         Load grid from the specified file
         :param file: relative path from __main__.py to the file
         """
-        try:
-            with open(file) as f:
-                content = [[True if c in ('1', 'o', 'O') else False if c in ('0', '.', '_') else quit(
-                    f"there is an illegal character '{c}' in the '{file}' file") for c in line.strip()] for line in f]
-        except FileNotFoundError:
-            quit(f"File '{file}' was not found!")
-
-        lengths = [len(row) for row in content]
-        max_len = max(lengths)
-        for row in content:
-            diff = max_len - len(row)
-            row.extend([False] * diff) if diff > 0 else None
-
-        content = list(map(list, zip(*content)))  # from [y][x] to [x][y]
-
-        self.cell_size = int(min(self.width / len(content), (self.height - MENU_HEIGHT) / len(content[0])))
-        if self.cell_size < MIN_CELL_SIZE:
-            quit(f"Cell size is too small: '{self.cell_size}' change min: '{MIN_CELL_SIZE} or modify num of rows/cols!")
-
-        self.grid_width = int(self.width / self.cell_size)
-        self.grid_height = int((self.height - MENU_HEIGHT) / self.cell_size)
-        # adding cols and rows to center loaded pattern
-        [content.insert(0, [False] * len(content[0])) for _ in range((self.grid_width - len(content)) // 2)]
-        [[content[x].insert(0, False) for _ in range((self.grid_height - len(content[-1])) // 2)] for x in
-         range(len(content))]
+        pattern = read_pattern(file)
+        if not self.universe:
+            self.cell_size = fit_pattern(pattern, self.width, self.height - MENU_HEIGHT)
+            if self.cell_size < MIN_CELL_SIZE:
+                quit(f"Cell size is too small: '{self.cell_size}' change min: '{MIN_CELL_SIZE} "
+                     f"or modify num of rows/cols!")
 
+        self.grid_width, self.grid_height = self.universe or (int(self.width / self.cell_size),
+                                                              int((self.height - MENU_HEIGHT) / self.cell_size))
         self.generation = 0
-        self.sprites = pg.sprite.Group()
-        self.cells = [[Cell(self, self.cell_size, x, y, color=BLACK, alive=True)
-                       if x < len(content) and y < len(content[0]) and content[x][y]
-                       else Cell(self, self.cell_size, x, y, color=WHITE)
-                       for y in range(self.grid_height)] for x in range(self.grid_width)]
+        self.board = place_pattern(pattern, self.grid_width, self.grid_height)
+        self.renderer.reset(self.board)
+        self.stats.reset(self.board)
+        self.history and self.history.record(self.generation, self.board)
 
     def save_to_file(self) -> str:
         """
-        Create a file to which the current grid will be saved
+        Create a file to which the current grid will be saved - in the SAVE_FORMAT, or in the binary format when the
+        grid is larger than SAVE_BINARY_CELLS
         :return: name of the created file
         """
         Path(SAVES).mkdir(parents=True, exist_ok=True)
-        filename = SAVES + datetime.now().strftime('%Y-%m-%dT%H-%M-%S-%f')[:-3] + ".txt"
-        with open(filename, 'w') as f:
-            for y in range(len(self.cells[0])):
-                for x in range(len(self.cells)):
-                    f.write('1' if self.cells[x][y].alive else '.')
-                f.write('\n')
+        extension = 'bin' if self.board.size > SAVE_BINARY_CELLS else SAVE_FORMAT
+        filename = SAVES + datetime.now().strftime('%Y-%m-%dT%H-%M-%S-%f')[:-3] + '.' + extension
+        write_pattern(self.board, filename)
         return filename
 
-    def new(self, action: Action = Action.INIT, file: str = None):
+    def new(self, file: str = None):
         """
-        Called when it is necessary to recreate the grid
-        :param action: This parameter is just passed to the create_list function
-        :param file: path to the pattern file or None
+        Called when it is necessary to recreate the universe - the camera is moved to its center
+        :param file: path to the already loaded pattern file or None - then the universe is randomized
         """
         if not file:
-            self.sprites = pg.sprite.Group()
-            self.grid_width = int(self.width / self.cell_size)
-            self.grid_height = int((self.height - MENU_HEIGHT) / self.cell_size)
-            self.create_list(action)
-        self.margin_x = int((self.width - self.grid_width * self.cell_size) / 2)
-        self.grid_image = pg.Surface([self.grid_width * self.cell_size + 1, self.grid_height * self.cell_size + 1])
-        self.draw_grid(self.grid_color)
+            self.grid_width, self.grid_height = self.universe or (int(self.width / self.cell_size),
+                                                                  int((self.height - MENU_HEIGHT) / self.cell_size))
+            self.fill_grid()
+        self.changed = np.zeros(self.board.shape, dtype=bool)
+        self.update_view()
+        self.camera_x = (self.grid_width - self.view_width) // 2
+        self.camera_y = (self.grid_height - self.view_height) // 2
+
+    def update_view(self):
+        """
+        Called when the size of the window or the size of the cell has changed - only the view is recreated, the
+        universe stays untouched
+        """
+        self.view_width = min(self.grid_width, self.width // self.cell_size)
+        self.view_height = min(self.grid_height, (self.height - MENU_HEIGHT) // self.cell_size)
+        self.margin_x = int((self.width - self.view_width * self.cell_size) / 2)
+        self.grid_image = pg.Surface([self.view_width * self.cell_size + 1, self.view_height * self.cell_size + 1])
+        self.grid_lines = None  # drawn by the next frame, so the repeated changes of the view don't draw it every time
         self.grid_image.fill(WHITE)
         self.screen.fill(WHITE)  # when size changed there might be black stripe
+        self.redraw = True
 
-    def create_list(self, action: Action):
+    def zoom(self, cell_size: int):
         """
-        Creates a list of Cell type objects, depending on the action - the old list could be copied
-        :param action: DECREASE- when new grid will be smaller, INCREASE - when new grid will be
-                        bigger or INIT if there is no need to copy Cell states of the old grid.
+        Changes the size of the cells, the cell in the center of the view stays in the center
+        :param cell_size: new length of the side of a square cell (px)
         """
-        if action is Action.INIT:
-            # just create new list of cells with random states
-            self.cells = [[Cell(self, self.cell_size, x, y) for y in range(self.grid_height)]
-                          for x in range(self.grid_width)]
-            self.fill_grid()
-        elif action is Action.INCREASE:
-            # extend the existing list by copying cells from the old list and adding new dead cells to the rest of
-            # the indexes
-            self.cells = [[Cell(self, self.cell_size, x, y, color=self.cells[x][y].color, alive=self.cells[x][y].alive)
-                           if x < len(self.cells) and y < len(self.cells[0])
-                           else Cell(self, self.cell_size, x, y, color=WHITE)
-                           for y in range(self.grid_height)] for x in range(self.grid_width)]
-        elif action is Action.DECREASE:
-            # copy bigger list to the smaller one (so copies only cells which will fit into the new one) - by new lower
-            # indexes - grid_width and grid_height
-            self.cells = [[Cell(self, self.cell_size, x, y, color=self.cells[x][y].color, alive=self.cells[x][y].alive)
-                           for y in range(self.grid_height)] for x in range(self.grid_width)]
+        center_x, center_y = self.camera_x + self.view_width // 2, self.camera_y + self.view_height // 2
+        self.cell_size = cell_size
+        self.update_view()
+        self.camera_x = (center_x - self.view_width // 2) % self.grid_width
+        self.camera_y = (center_y - self.view_height // 2) % self.grid_height
+
+    def move_camera(self, dx: int, dy: int):
+        """
+        Moves the view over the universe (wraps around the edges)
+        :param dx: number of columns
+        :param dy: number of rows
+        """
+        self.camera_x = (self.camera_x + dx) % self.grid_width
+        self.camera_y = (self.camera_y + dy) % self.grid_height
+        self.redraw = True
 
     def fill_grid(self, action: Action = Action.RANDOMIZE):
         """
@@ -141,45 +182,94 @@ class GameOfLife:
         :param action:
         """
         self.generation = 0
-        for x in range(self.grid_width):
-            for y in range(self.grid_height):
-                if action is Action.RANDOMIZE:
-                    self.cells[x][y].revive() if choice([0, 1]) == 1 else self.cells[x][y].kill()
-                elif action is Action.CLEAR:
-                    self.cells[x][y].kill()
+        if action is Action.RANDOMIZE:
+            self.board = np.random.randint(0, 2, (self.grid_width, self.grid_height), dtype=np.uint8)
+        elif action is Action.CLEAR:
+            self.board = np.zeros((self.grid_width, self.grid_height), dtype=np.uint8)
+        self.renderer.reset(self.board)
+        self.stats.reset(self.board)
+        self.history and self.history.record(self.generation, self.board)
+        self.changed = np.zeros(self.board.shape, dtype=bool)
+        self.redraw = True
+
+    def start_recording(self, path: str = None):
+        """
+        Starts recording the shown generations (every stride-th one) in the background writer process
+        :param path: path to the GIF file or the directory of the PNG files, None means the new file in RECORDINGS
+        :return: path of the recording
+        """
+        path = path or RECORDINGS + datetime.now().strftime('%Y-%m-%dT%H-%M-%S') + ('.gif' * (RECORD_FORMAT == 'gif'))
+        self.recorder = Recorder(path, self.stride, drop=not self.backpressure)
+        self.recorder.record(self.generation, self.board)
+        return path
+
+    def stop_recording(self):
+        """
+        Stops the recording, the writer finishes the queued frames in the background
+        """
+        self.recorder.close()
+        self.recorder = None
+
+    def rewind(self, steps: int = 1):
+        """
+        Returns to the board shown the given number of steps back (the history keeps the boards shown after every
+        frame, randomization, clearing and loading) and pauses the game
+        :param steps: number of the shown boards to go back
+        """
+        restored = self.history and self.history.rewind(self.board, steps)
+        if not restored:
+            print('Nothing to rewind')
+            return
+        self.generation, self.board = restored
+        self.paused = True
+        self.renderer.reset(self.board)
+        self.stats.reset(self.board, self.generation)
+        self.changed = np.zeros(self.board.shape, dtype=bool)
+        self.redraw = True
 
     def calculate_font_sizes(self):
+        """
+        Chooses the biggest fonts which fit into the window - the font files, the fonts and the sizes for the window
+        size are cached (see Fonts), so the resize to the size seen before doesn't load or measure anything
+        """
         text_bottom = 'Generation: XXXXXX  Alive cells: XXXXXX'
-        text_help = 't :  switch cell sizes xxx x xxx (xxxxxx)'
-
-        size = MENU_HEIGHT
-        while True:
-            self.font_info = pg.font.SysFont(FONT, size)
-            text_width, text_height = self.font_info.size(text_bottom)
-            if text_width < self.width and text_height < MENU_HEIGHT:
-                break
-            size -= 1
-
-        size = int(self.height * 6 / 8 / 18)
-        while True:
-            self.font_help = pg.font.SysFont(FONT_MENU, size)
-            self.f1_menu_width, self.f1_line_height = self.font_help.size(text_help)
-            if self.f1_menu_width < self.width / 3 and self.f1_line_height * 18 < self.height * 6 / 8:
-                break
-            size -= 1
+        # the widest lines of the menu (see menu_lines) with the longest expected values
+        texts_help = ('j | [ | ] :  jump 2^k generations on the plane (k=00, computing)',
+                      't :  switch cell sizes (view 0000x0000)',
+                      'arrows :  move view (00000, 00000) of 00000x00000',
+                      'u :  turbo (off, 000000000 gens/s)',
+                      'a :  auto-pause when stable (on, period 0000 at 0000000)',
+                      f'v :  record every {self.stride}. generation (off)',
+                      f'Backspace :  rewind (with shift {HISTORY_SCRUB} shown boards)')
+        font_info = font(FONT, fit_font_size(FONT, text_bottom, self.width, MENU_HEIGHT, MENU_HEIGHT))
+        line_height = self.height * 6 / 8 / MENU_LINES
+        self.help_size = min(fit_font_size(FONT_MENU, text, self.width / 3, line_height, int(line_height))
+                             for text in texts_help)
+        font_help = font(FONT_MENU, self.help_size)
+        widths, heights = zip(*(font_help.size(text) for text in texts_help))
+        self.f1_menu_width, self.f1_line_height = max(widths) + 10, max(heights)  # the lines are drawn 5 px indented
+
+        # the rendered texts are valid only for the fonts they were rendered with
+        if font_info is not self.font_info:
+            self.font_info, self.info_text = font_info, TextCache(font_info)
+        if font_help is not self.font_help:
+            self.font_help, self.help_text = font_help, TextCache(font_help)
+            self.menu_surface = self.menu_key = None
+            # the font of the profiler overlay is loaded when the overlay is shown
+            self.font_profile = self.profile_text = self.profile_surface = self.profile_key = None
 
     def draw_grid(self, color=GREY):
         """
         Draw the additional grid/net
         :param color: color of the drawn lines
         """
-        self.grid_lines = pg.Surface([self.grid_width * self.cell_size + 1, self.grid_height * self.cell_size + 1],
+        self.grid_lines = pg.Surface([self.view_width * self.cell_size + 1, self.view_height * self.cell_size + 1],
                                      SRCALPHA)
         self.grid_lines.fill(WHITE + (0,))
-        width, height = self.grid_width * self.cell_size, self.grid_height * self.cell_size
+        width, height = self.view_width * self.cell_size, self.view_height * self.cell_size
 
         pg.draw.lines(self.grid_lines, GREY, True, ((0, 0), (width, 0), (width, height), (0, height)))  # border
-        if color is None:
+        if color is None or self.cell_size < MIN_GRID_CELL_SIZE:
             return
 
         for x in range(self.cell_size, width, self.cell_size):
@@ -193,7 +283,7 @@ class GameOfLife:
         :param color: color of the drawn text
         :param background: color of the drawn background
         """
-        render = lambda txt: self.font_info.render(txt, False, color, background)
+        render = lambda txt: self.info_text.render(txt, color, background)
 
         text = render(f'Generation: {self.generation}')
         text2 = render(f'Alive cells: {self.count_alive_cells()}')
@@ -201,18 +291,11 @@ class GameOfLife:
         self.screen.blits([(text, (0, self.height - MENU_HEIGHT + 1)),
                            (text2, (self.width - text2.get_size()[0], self.height - MENU_HEIGHT + 1))])
 
-    def draw_menu(self, color=BLACK, background=WHITE + (222,)):
+    def menu_lines(self) -> tuple:
         """
-        A function that draws the menu available under the f1 button
-        :param color:  color of the drawn text
-        :param background: color of the drawn background
+        Returns the content of the menu available under the f1 button
+        :return: tuple of (line number, text) tuples
         """
-        blit_line = lambda pos, text: \
-            menu_bg.blit(self.font_help.render(text, False, color), (5, self.f1_line_height * pos))
-
-        menu_bg = pg.Surface([self.f1_menu_width, self.f1_line_height * 18], SRCALPHA)
-        menu_bg.fill(background)
-
         dead_colors = {WHITE: 'WHITE',
                        LIGHTEST_GREY: 'LIGHTEST GREY',
                        LIGHTER_GREY: 'LIGHTER GREY',
@@ -222,90 +305,203 @@ class GameOfLife:
                        WHITE: 'WHITE'
                        }
 
-        blit_line(0, f'{TITLE}      FPS:{round(self.clock.get_fps())}')
-        blit_line(2, f'F1:  show / hide menu')
-        blit_line(3, f'g :  show / hide grid ({grid_colors[self.grid_color]})')
-        blit_line(4, f'w :  show / hide route ({"shown" if self.show_route else "hidden"})')
-        blit_line(5, f'e :  next color for dead cells')
-        blit_line(6, f'      ({dead_colors[self.dead_color]})')
-        blit_line(7, f'p :  run / pause ({"paused" if self.paused else "running"})')
-        blit_line(8, f's :  save grid to a file')
-        blit_line(9, f'r :  randomize grid')
-        blit_line(10, f'n :  display next generation')
-        blit_line(11,
-                  f't :  switch cell sizes {self.grid_width}x{self.grid_height} ({self.grid_width * self.grid_height})')
-        blit_line(12, f'z | x :  adjust cell sizes ({self.cell_size})')
-        blit_line(13, f', | . :  generations per second ({self.gens_per_sec})')
-        blit_line(14, f'LMB :  set cell as alive')
-        blit_line(15, f'RMB :  set cell as dead')
-        blit_line(16, f'q :  quit')
-
-        self.grid_image.blit(menu_bg, (0, 0))
-
-    def draw(self):
-        """
-        A function that draws everything on the screen - sprites, grid, help menu and info
-        """
-        self.sprites.draw(self.grid_image)
+        fps = round(self.clock.get_fps() / FPS_BUCKET) * FPS_BUCKET
+        cycles = self.stats.cycles
+        cycle = f', period {cycles.period} at {cycles.stabilized}' if cycles.period else ''
+        return ((0, f'{TITLE}      FPS:{fps}'),
+                (2, f'F1:  show / hide menu'),
+                (3, f'g :  show / hide grid ({grid_colors[self.grid_color]})'),
+                (4, f'w :  show / hide route ({"shown" if self.show_route else "hidden"})'),
+                (5, f'e :  next color for dead cells'),
+                (6, f'      ({dead_colors[self.dead_color]})'),
+                (7, f'p :  run / pause ({"paused" if self.paused else "running"})'),
+                (8, f's :  save grid to a file'),
+                (9, f'r :  randomize grid'),
+                (10, f'n :  display next generation'),
+                (11, f'j | [ | ] :  jump 2^k generations on the plane '
+                     f'(k={self.jump_exponent}{", computing" if self.jump else ""})'),
+                (12, f't :  switch cell sizes (view {self.view_width}x{self.view_height})'),
+                (13, f'z | x :  adjust cell sizes ({self.cell_size})'),
+                (14, f'arrows :  move view ({self.camera_x}, {self.camera_y}) '
+                     f'of {self.grid_width}x{self.grid_height}'),
+                (15, f', | . :  generations per second ({self.gens_per_sec})'),
+                (16, f'u :  turbo ({"on" if self.scheduler.turbo else "off"}, {self.scheduler.speed} gens/s)'),
+                (17, f'a :  auto-pause when stable ({"on" if self.auto_pause else "off"}{cycle})'),
+                (18, f'o | d :  profiler overlay / dump timings'),
+                (19, f'v :  record every {self.stride}. generation ({"on" if self.recorder else "off"})'),
+                (20, f'Backspace :  rewind (with shift {HISTORY_SCRUB} shown boards)'),
+                (21, f'LMB :  set cell as alive'),
+                (22, f'RMB :  set cell as dead'),
+                (23, f'q :  quit'))
+
+    def draw_menu(self, lines: tuple, color=BLACK, background=WHITE + (222,)):
+        """
+        A function that draws the menu available under the f1 button
+        The menu is composed again only when its content has changed, the lines are cached by the text cache
+        :param lines: content of the menu returned by menu_lines
+        :param color:  color of the drawn text
+        :param background: color of the drawn background
+        """
+        if (lines, color, background) != self.menu_key:
+            self.menu_surface = pg.Surface([self.f1_menu_width, self.f1_line_height * MENU_LINES], SRCALPHA)
+            self.menu_surface.fill(background)
+            for pos, text in lines:
+                self.menu_surface.blit(self.help_text.render(text, color), (5, self.f1_line_height * pos))
+            self.menu_key = (lines, color, background)
+
+        self.grid_image.blit(self.menu_surface, (0, 0))
+
+    def draw_profile(self, lines: tuple, color=BLACK, background=WHITE + (222,)):
+        """
+        Draws the overlay with the timings of the phases in the top right corner of the grid
+        :param lines: lines returned by the profiler
+        :param color:  color of the drawn text
+        :param background: color of the drawn background
+        """
+        if self.font_profile is None:
+            self.font_profile = font(FONT_PROFILE, self.help_size)
+            self.profile_text = TextCache(self.font_profile)
+        if lines != self.profile_key:
+            surfaces = [self.profile_text.render(line, color) for line in lines]
+            height = self.font_profile.get_linesize()
+            self.profile_surface = pg.Surface([max(surface.get_width() for surface in surfaces) + 10,
+                                               height * len(surfaces)], SRCALPHA)
+            self.profile_surface.fill(background)
+            for i, surface in enumerate(surfaces):
+                self.profile_surface.blit(surface, (5, height * i))
+            self.profile_key = lines
+
+        self.grid_image.blit(self.profile_surface, (self.grid_image.get_width() - self.profile_surface.get_width(), 0))
+
+    def draw(self, start: float = 0.0) -> float:
+        """
+        A function that draws everything on the screen - cells, grid, help menu and info
+        In the change tracking mode only the changed regions are updated (or nothing, if nothing has changed)
+        :param start: start of the drawing for the profiler
+        :return: end of the drawing for the profiler
+        """
+        lap = self.profiler.lap
+        menu = self.show_menu and self.menu_lines()
+        info = (self.generation, self.count_alive_cells())
+        view = (self.camera_x, self.camera_y, self.view_width, self.view_height)
+        changed = (np.argwhere(self.renderer.crop(self.changed, *view)) if self.marked else np.empty((0, 2), int)) \
+            if self.dirty and not self.redraw and not self.show_profile else None
+        start = lap('prepare', start)
+        if changed is not None and not len(changed) and menu == self.drawn_menu and info == self.drawn_info:
+            return start
+
+        self.renderer.draw(self.grid_image, self.cell_size, *view)
+        start = lap('cells', start)
+        self.grid_lines is None and self.draw_grid(self.grid_color)
         self.grid_image.blit(self.grid_lines, (0, 0))
-        self.show_menu and self.draw_menu()
+        start = lap('grid', start)
+        menu and self.draw_menu(menu)
+        self.show_profile and self.draw_profile(self.profiler.overlay_lines())
+        start = lap('menu', start)
         self.screen.blit(self.grid_image, (self.margin_x, 0))
         self.draw_info()
-        pg.display.flip()
+        start = lap('info', start)
+
+        if changed is None or len(changed) > MAX_DIRTY_RECTS:
+            pg.display.flip()
+        else:
+            rects = [(self.margin_x + x * self.cell_size, y * self.cell_size, self.cell_size + 1, self.cell_size + 1)
+                     for x, y in changed.tolist()]
+            menu != self.drawn_menu and rects.append(
+                (self.margin_x, 0, self.f1_menu_width, self.f1_line_height * MENU_LINES))
+            info != self.drawn_info and rects.append((0, self.height - MENU_HEIGHT, self.width, MENU_HEIGHT))
+            pg.display.update(rects)
+
+        self.redraw = self.marked = False
+        self.drawn_menu, self.drawn_info = menu, info
+        return lap('display', start)
 
     def count_alive_cells(self) -> int:
         """
-        Returns the number of cells currently alive
+        Returns the number of cells currently alive (maintained incrementally by the stats)
         """
-        return sum(sum(1 for cell in x if cell.alive) for x in self.cells)
+        return self.stats.population
 
-    def count_cell_neighbors(self, x: int, y: int) -> int:
+    def set_cells_state(self, board: np.ndarray, diff: np.ndarray = None):
         """
-        Get the number of alive neighbors of the specific cell
-        :param x: The index of the specific cell
-        :param y: The index of the specific cell
-        :return: The number of alive neighbors of that cell
+        Replaces the board with the new one and recolors the cells which changed accordingly
+        :param board: uint8 array [x][y]
+        :param diff: self.board ^ board when it was already computed
         """
-        prev_x = x - 1
-        prev_y = y - 1
-        next_x = (x + 1) % self.grid_width
-        next_y = (y + 1) % self.grid_height
-        return self.cells[prev_x][prev_y].alive + self.cells[prev_x][y].alive + self.cells[prev_x][next_y].alive + \
-               self.cells[x][prev_y].alive + self.cells[x][next_y].alive + \
-               self.cells[next_x][prev_y].alive + self.cells[next_x][y].alive + self.cells[next_x][next_y].alive
+        changed = self.renderer.update(self.board, board, diff)
+        if self.marked:
+            self.changed |= changed
+        else:
+            self.changed = changed
+        self.marked = True
+        self.board = board
 
-    def set_cells_state(self):
+    def update_generation(self, generations: int = 1, engine=None, board: np.ndarray = None):
         """
-        Sets the state of every cell depending on the number of neighbors
+        Computes the next generations with the engine and calls function which set the state of every cell, then
+        increments the generation counter
+        :param generations: number of generations to compute at once
+        :param engine: engine used instead of the default one
+        :param board: the board already computed by the scheduler (the engine is not used)
         """
-        temp = []
-        for x in range(self.grid_width):
-            temp.append([])
-            for y in range(self.grid_height):
-                state = self.cells[x][y].alive
-                neighbors = self.count_cell_neighbors(x, y)
-                if state == 0 and neighbors == 3:
-                    temp[x].append(True)
-                elif state == 1 and neighbors < 2 or neighbors > 3:
-                    temp[x].append(False)
-                else:
-                    temp[x].append(state)
+        if board is None:
+            board = (engine or self.engine).step(self.board, generations)
+        diff = self.board ^ board  # shared by the stats and the renderer
+        stabilized = self.stats.step(self.board, board, generations, diff)
+        self.set_cells_state(board, diff)
+        self.generation += generations
+        self.history and self.history.record(self.generation, self.board)
+        self.recorder and self.recorder.record(self.generation, self.board)
+        stabilized and self.stabilized()
 
-        # revive / kill cell depending on the boolean in temp list
-        for x in range(self.grid_width):
-            for y in range(self.grid_height):
-                if temp[x][y]:
-                    self.cells[x][y].survive() if self.cells[x][y].alive else self.cells[x][y].revive(BLACK)
-                else:
-                    if self.cells[x][y].alive:
-                        self.cells[x][y].kill(self.dead_color) if self.show_route else self.cells[x][y].kill()
+    def stabilized(self):
+        """
+        Called when the board has stabilized - reports the cycle and pauses the game in the auto-pause mode
+        """
+        cycles = self.stats.cycles
+        print(f'Stabilized at generation {cycles.stabilized} with period {cycles.period}')
+        if self.auto_pause and not self.paused:
+            self.paused = True
+            self.scheduler.hold(self.board)
 
-    def update_generation(self):
+    def show_scheduled(self, board: np.ndarray, generations: int):
         """
-        Calls function which set the state of every cell in next generation, then increments the generation counter
+        Shows the board computed by the scheduler, if it computed any generations
+        :param board: uint8 array [x][y]
+        :param generations: number of generations the board is ahead of the current one
         """
-        self.set_cells_state()
-        self.generation += 1
+        generations and self.update_generation(generations, board=board)
+
+    def jump_generations(self):
+        """
+        Advances the board by 2^k generations at once with the HashLife engine in the background thread, so the window
+        stays responsive (the pattern evolves on an unbounded plane, so cells which leave the board are dropped)
+        """
+        generations = 1 << self.jump_exponent
+        if self.jump is not None:
+            print('The previous jump is still computed')
+            return
+        if self.jump_engine is None:
+            self.jump_engine = create_engine('hashlife')
+        board, result = self.board.copy(), []
+        thread = Thread(target=lambda: result.append(self.jump_engine.step(board, generations)), daemon=True)
+        self.jump = (thread, self.generation, board, generations, result)
+        thread.start()
+
+    def finish_jump(self):
+        """
+        Shows the board of the jump computed in the background when it is finished, the board is dropped when the game
+        was resumed or the board was modified in the meantime
+        """
+        thread, generation, board, generations, result = self.jump
+        if thread.is_alive():
+            return
+        self.jump = None
+        if not result or not self.paused or generation != self.generation or not np.array_equal(board, self.board):
+            print(f'Jump of {generations} generations dropped - the board has changed')
+            return
+        print(f'Jump of {generations} generations finished')
+        self.update_generation(generations, board=result[0])
 
     def compute_mouse_pos(self, pos: (int, int)) -> (int, int):
         """
@@ -314,9 +510,10 @@ class GameOfLife:
         :return: (None, None) if clicked not on the grid otherwise tuple (col, row)
         """
         # only if clicked above menu bar (on the grid image)
-        if self.margin_x < pos[0] < (self.grid_width * self.cell_size + self.margin_x):
-            if 0 < pos[1] < (self.grid_height * self.cell_size):
-                return ((pos[0] - self.margin_x) // self.cell_size), (pos[1] // self.cell_size)
+        if self.margin_x < pos[0] < (self.view_width * self.cell_size + self.margin_x):
+            if 0 < pos[1] < (self.view_height * self.cell_size):
+                return (self.camera_x + (pos[0] - self.margin_x) // self.cell_size) % self.grid_width, \
+                       (self.camera_y + pos[1] // self.cell_size) % self.grid_height
         return None, None
 
     def handle_keys(self, event: pg.event.Event):
@@ -335,19 +532,23 @@ class GameOfLife:
         elif event.key == pg.K_w:
             print("'w' pressed! - toggling route view")
             self.show_route = not self.show_route
+            self.renderer.recolor(self.dead_color if self.show_route else WHITE)
         elif event.key == pg.K_e:
             print("'e' pressed! - next color for dead cells")
             self.dead_color = next(DEAD_COLOR)
+            self.renderer.recolor(self.dead_color if self.show_route else WHITE)
         elif self.paused and event.key == pg.K_n:
             print("'n' pressed! - displaying next generation")
             self.update_generation()
+        elif self.paused and event.key == pg.K_j:
+            print(f"'j' pressed! - jumping 2^{self.jump_exponent} generations")
+            self.jump_generations()
         elif event.key == pg.K_c:
             print("'c' pressed! - clearing grid")
             self.fill_grid(Action.CLEAR)
         elif event.key == pg.K_t:
             print("'t' pressed! - changing cell size")
-            self.cell_size = next(CELL_SIZES)
-            self.new()
+            self.zoom(next(CELL_SIZES))
         elif event.key == pg.K_g:
             print("'g' pressed! - toggling grid")
             self.grid_color = next(GRID_COLOR)
@@ -356,15 +557,45 @@ class GameOfLife:
             self.increase_cell_size()
         elif event.key == pg.K_z:
             self.decrease_cell_size()
+        elif event.key == pg.K_u:
+            print("'u' pressed! - toggling turbo mode")
+            self.scheduler.turbo = not self.scheduler.turbo
+        elif event.key == pg.K_a:
+            print("'a' pressed! - toggling auto-pause")
+            self.auto_pause = not self.auto_pause
+        elif event.key == pg.K_o:
+            print("'o' pressed! - toggling profiler overlay")
+            self.show_profile = not self.show_profile
+            self.profiler.enabled = self.show_profile or bool(self.profile_file)
+        elif event.key == pg.K_d:
+            self.profiler.dump(self.profile_file or PROFILE_FILE)
+            print(f"'d' pressed! - timings dumped to '{self.profile_file or PROFILE_FILE}'")
+        elif event.key == pg.K_v:
+            if self.recorder:
+                print("'v' pressed! - recording stopped")
+                self.stop_recording()
+            else:
+                print(f"'v' pressed! - recording to '{self.start_recording()}'")
+        elif event.key == pg.K_BACKSPACE:
+            steps = HISTORY_SCRUB if event.mod & pg.KMOD_SHIFT else 1
+            print(f"'Backspace' pressed! - rewinding {steps} shown board{'s' * (steps > 1)}")
+            self.rewind(steps)
         elif event.key == pg.K_F1:
             print("'F1' pressed! - toggling menu view")
             self.show_menu = not self.show_menu
         elif event.key == pg.K_s:
             print(f"'s' pressed ! - saved to file  '{self.save_to_file()}'")
+        elif event.key in (pg.K_LEFT, pg.K_RIGHT, pg.K_UP, pg.K_DOWN):
+            self.move_camera(CAMERA_STEP * ((event.key == pg.K_RIGHT) - (event.key == pg.K_LEFT)),
+                             CAMERA_STEP * ((event.key == pg.K_DOWN) - (event.key == pg.K_UP)))
         elif event.unicode == ',':
             self.decrease_gens_per_sec()
         elif event.unicode == '.':
             self.increase_gens_per_sec()
+        elif event.unicode == '[':
+            self.jump_exponent = max(MIN_JUMP_EXPONENT, self.jump_exponent - 1)
+        elif event.unicode == ']':
+            self.jump_exponent = min(MAX_JUMP_EXPONENT, self.jump_exponent + 1)
 
     def handle_mouse_scroll(self, button: int, ctrl: bool = False):
         """
@@ -392,31 +623,54 @@ class GameOfLife:
         if col is None:
             return
 
-        state = self.cells[col][row].alive
+        state = self.board[col, row]
         if button[LMB] and not state:
-            self.cells[col][row].revive()
+            self.board[col, row] = 1
+            self.engine.touch(col, row)
+            self.stats.set_cell(col, row, True)
+            self.renderer.revive(col, row)
+            self.mark(col, row)
         elif button[RMB] and state:
-            self.cells[col][row].kill()
+            self.board[col, row] = 0
+            self.engine.touch(col, row)
+            self.stats.set_cell(col, row, False)
+            self.renderer.kill(col, row)
+            self.mark(col, row)
+
+    def mark(self, col: int, row: int):
+        """
+        Marks the cell as changed - the stale mask (already drawn) is cleared first
+        """
+        self.marked or self.changed.fill(False)
+        self.changed[col, row] = self.marked = True
 
     def handle_events(self):
         """
         Handle all of the events
+        The simulation is held while the events are handled, because they can modify the board
+        Only the last resize of the frame is applied (dragging the window sends many of them)
         """
-        for event in pg.event.get():
-            if event.type == self.new_gen_event and not self.paused:
-                self.update_generation()
-            elif event.type == QUIT:
+        events = pg.event.get()
+        if not events:
+            return
+        self.paused or self.show_scheduled(*self.scheduler.hold(self.board))
+        resize = next((event for event in reversed(events) if event.type == VIDEORESIZE), None)
+
+        for event in events:
+            if event.type == QUIT:
                 quit("App window was closed!")
             elif event.type == VIDEORESIZE:
-                width_before, height_before = self.width, self.height
+                if event is not resize:
+                    continue
                 self.width = MIN_WIDTH if event.w < MIN_WIDTH else event.w
                 self.height = MIN_HEIGHT if event.h < MIN_HEIGHT else event.h
                 self.screen = pg.display.set_mode((self.width, self.height), HWSURFACE | DOUBLEBUF | RESIZABLE)
-                (width_before < self.width or height_before < self.height) and self.new(action=Action.INCREASE)
-                (width_before > self.width or height_before > self.grid_height) and self.new(action=Action.DECREASE)
+                self.zoom(self.cell_size)
                 self.calculate_font_sizes()
+                self.redraw = True
             elif event.type == KEYDOWN:
                 self.handle_keys(event)
+                self.redraw = True
             elif (keys := pg.key.get_pressed()) and (keys[pg.K_LCTRL] or keys[pg.K_RCTRL]):
                 if event.type == MOUSEBUTTONDOWN and (event.button == WHEEL_DOWN or event.button == WHEEL_UP):
                     self.handle_mouse_scroll(event.button, ctrl=True)
@@ -426,35 +680,47 @@ class GameOfLife:
                     self.handle_mouse_scroll(event.button)
                 self.handle_mouse_buttons(event, button)
 
+        self.paused or self.scheduler.release(self.board)
+
     def increase_gens_per_sec(self):
         if self.gens_per_sec <= (MAX_GENS_PER_SEC - CHANGE_GENS_PER_SEC):
             print('Generations per second increased!')
             self.gens_per_sec += CHANGE_GENS_PER_SEC
-            pg.time.set_timer(self.new_gen_event, int(1000 / self.gens_per_sec))
+            self.scheduler.gens_per_sec = self.gens_per_sec
 
     def decrease_gens_per_sec(self):
         if self.gens_per_sec >= (MIN_GENS_PER_SEC + CHANGE_GENS_PER_SEC):
             print('Generations per second decreased!')
             self.gens_per_sec -= CHANGE_GENS_PER_SEC
-            pg.time.set_timer(self.new_gen_event, int(1000 / self.gens_per_sec))
+            self.scheduler.gens_per_sec = self.gens_per_sec
 
     def increase_cell_size(self):
         if self.cell_size <= (MAX_CELL_SIZE - CHANGE_CELL_SIZE):
             print('Cell size increased!')
-            self.cell_size += CHANGE_CELL_SIZE
-            self.new(action=Action.DECREASE)
+            self.zoom(self.cell_size + CHANGE_CELL_SIZE)
 
     def decrease_cell_size(self):
         if self.cell_size >= (MIN_CELL_SIZE + CHANGE_CELL_SIZE):
             print('Cell size decreased!')
-            self.cell_size -= CHANGE_CELL_SIZE
-            self.new(action=Action.INCREASE)
+            self.zoom(self.cell_size - CHANGE_CELL_SIZE)
 
     def run(self):
         """
         Starts the game and loops until the quit state
+        Every phase of the frame is measured by the profiler (when it is enabled)
         """
-        while True:
-            self.handle_events()
-            self.draw()
-            self.clock.tick(self.fps)
+        lap = self.profiler.lap
+        try:
+            while True:
+                start = self.profiler.start()
+                self.handle_events()
+                self.jump and self.finish_jump()
+                start = lap('events', start)
+                self.paused or self.show_scheduled(*self.scheduler.advance(self.board))
+                start = lap('simulate', start)
+                start = self.draw(start)
+                self.clock.tick(self.fps)
+                lap('wait', start)
+        finally:
+            self.profile_file and self.profiler.dump(self.profile_file)
+            self.recorder and self.stop_recording()
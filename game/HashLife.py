@@ -0,0 +1,245 @@
+from Settings import np, HASHLIFE_MAX_NODES
+from Engine import Engine
+
+
+class Node:
+    """
+    Node of the quadtree - square of 2^k x 2^k cells made of four 2^(k-1) x 2^(k-1) quadrants
+    Nodes are canonical (there is only one node for every content), so they can be compared by identity
+    """
+    __slots__ = ('k', 'nw', 'ne', 'sw', 'se', 'n')
+
+    def __init__(self, k: int, nw, ne, sw, se, n: int):
+        self.k = k  # level of the node
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se  # quadrants (None for the single cells)
+        self.n = n  # population
+
+
+OFF = Node(0, None, None, None, None, 0)
+ON = Node(0, None, None, None, None, 1)
+
+
+class HashLifeEngine(Engine):
+    """
+    Memoized quadtree engine (HashLife) - 2^j generations of any node are computed only once and then reused, so
+    regular patterns can be advanced by millions of generations in a single call.
+    The pattern evolves on an unbounded plane - cells which leave the board are dropped, so the result is the same as
+    on the toroidal board only while the pattern does not reach its edges.
+    """
+    name = 'hashlife'
+    toroidal = False
+
+    def __init__(self, max_nodes: int = HASHLIFE_MAX_NODES):
+        """
+        :param max_nodes: when there are more nodes in the cache, the nodes which are not used are collected (between
+            the steps of the jump) or the whole cache is forgotten (within a step)
+        """
+        self.max_nodes = max_nodes
+        self.nodes = {}  # (nw, ne, sw, se) -> canonical node
+        self.results = {}  # (node, j) -> center of the node 2^j generations later
+        self.blocks = {}  # 16 bit code of 4x4 cells -> canonical node
+        self.zeros = [OFF]  # empty nodes of each level
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        """
+        Returns the canonical node made of the given quadrants
+        """
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = Node(nw.k + 1, nw, ne, sw, se, nw.n + ne.n + sw.n + se.n)
+        return node
+
+    def zero(self, k: int) -> Node:
+        """
+        Returns the empty node of the level k
+        """
+        while len(self.zeros) <= k:
+            z = self.zeros[-1]
+            self.zeros.append(self.join(z, z, z, z))
+        return self.zeros[k]
+
+    def centre(self, m: Node) -> Node:
+        """
+        Returns the node one level higher with the given node in the center (surrounded by empty cells)
+        """
+        z = self.zero(m.k - 1)
+        return self.join(self.join(z, z, z, m.nw), self.join(z, z, m.ne, z),
+                         self.join(z, m.sw, z, z), self.join(m.se, z, z, z))
+
+    def inner(self, m: Node) -> Node:
+        """
+        Returns the node one level lower from the center of the given node
+        """
+        return self.join(m.nw.se, m.ne.sw, m.sw.ne, m.se.nw)
+
+    def life_4x4(self, m: Node) -> Node:
+        """
+        Computes the next generation of the 2x2 center of the 4x4 node
+        """
+        cells = [[m.nw.nw.n, m.nw.ne.n, m.ne.nw.n, m.ne.ne.n],
+                 [m.nw.sw.n, m.nw.se.n, m.ne.sw.n, m.ne.se.n],
+                 [m.sw.nw.n, m.sw.ne.n, m.se.nw.n, m.se.ne.n],
+                 [m.sw.sw.n, m.sw.se.n, m.se.sw.n, m.se.se.n]]  # [y][x]
+
+        def next_state(x, y):
+            neighbors = sum(cells[y + dy][x + dx] for dy in (-1, 0, 1) for dx in (-1, 0, 1)) - cells[y][x]
+            return ON if neighbors == 3 or (cells[y][x] and neighbors == 2) else OFF
+
+        return self.join(next_state(1, 1), next_state(2, 1), next_state(1, 2), next_state(2, 2))
+
+    def successor(self, m: Node, j: int) -> Node:
+        """
+        Computes the center of the node (one level lower) 2^j generations later
+        :param m: node of the level k >= 2
+        :param j: exponent of the number of generations, it is limited to k - 2
+        """
+        j = min(j, m.k - 2)
+        key = (m, j)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+
+        if m.n == 0:
+            result = m.nw
+        elif m.k == 2:
+            result = self.life_4x4(m)
+        else:
+            a, b, c, d = m.nw, m.ne, m.sw, m.se
+            join, successor = self.join, self.successor
+            # nine overlapping subnodes, each advanced by 2^j (or by half of it, when the whole jump is maximal)
+            c1 = successor(a, j)
+            c2 = successor(join(a.ne, b.nw, a.se, b.sw), j)
+            c3 = successor(b, j)
+            c4 = successor(join(a.sw, a.se, c.nw, c.ne), j)
+            c5 = successor(join(a.se, b.sw, c.ne, d.nw), j)
+            c6 = successor(join(b.sw, b.se, d.nw, d.ne), j)
+            c7 = successor(c, j)
+            c8 = successor(join(c.ne, d.nw, c.se, d.sw), j)
+            c9 = successor(d, j)
+            if j < m.k - 2:
+                result = join(join(c1.se, c2.sw, c4.ne, c5.nw), join(c2.se, c3.sw, c5.ne, c6.nw),
+                              join(c4.se, c5.sw, c7.ne, c8.nw), join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                result = join(successor(join(c1, c2, c4, c5), j), successor(join(c2, c3, c5, c6), j),
+                              successor(join(c4, c5, c7, c8), j), successor(join(c5, c6, c8, c9), j))
+
+        self.results[key] = result
+        len(self.nodes) > self.max_nodes and self.forget()
+        return result
+
+    def forget(self):
+        """
+        Forgets all the nodes and the computed results - the nodes used by the running computation stay valid, they are
+        only not canonical anymore (equal nodes may be created again), so the results stay correct
+        """
+        self.nodes.clear()
+        self.results.clear()
+        self.blocks.clear()
+        for z, parent in zip(self.zeros, self.zeros[1:]):
+            self.nodes[(z, z, z, z)] = parent
+
+    def block(self, code: int) -> Node:
+        """
+        Returns the node of 4x4 cells, bit (4 * y + x) of the code is the state of the cell (x, y)
+        """
+        node = self.blocks.get(code)
+        if node is None:
+            cell = lambda x, y: ON if code >> (4 * y + x) & 1 else OFF
+            quadrant = lambda x, y: self.join(cell(x, y), cell(x + 1, y), cell(x, y + 1), cell(x + 1, y + 1))
+            node = self.blocks[code] = self.join(quadrant(0, 0), quadrant(2, 0), quadrant(0, 2), quadrant(2, 2))
+        return node
+
+    def from_array(self, board: np.ndarray) -> Node:
+        """
+        Builds the quadtree of the board, the top left corner of the board is the top left corner of the node
+        :param board: uint8 array [x][y]
+        """
+        width, height = -(-board.shape[0] // 4) * 4, -(-board.shape[1] // 4) * 4
+        padded = np.zeros((width, height), dtype=np.uint16)
+        padded[:board.shape[0], :board.shape[1]] = board
+        # codes of all the 4x4 blocks - [block x, x, block y, y]
+        weights = (1 << (4 * np.arange(4)[np.newaxis, :] + np.arange(4)[:, np.newaxis])).astype(np.uint16)
+        codes = (padded.reshape(width // 4, 4, height // 4, 4) * weights[np.newaxis, :, np.newaxis, :]).sum(
+            axis=(1, 3), dtype=np.uint16)
+
+        nodes = {(bx, by): self.block(code) for bx, by, code in
+                 zip(*np.nonzero(codes), codes[np.nonzero(codes)].tolist())}
+        k = 2
+        while 1 << k < max(width, height):
+            z = self.zero(k)
+            parents = {}
+            for (bx, by), node in nodes.items():
+                parents.setdefault((bx >> 1, by >> 1), [z, z, z, z])[(by & 1) * 2 + (bx & 1)] = node
+            nodes = {pos: self.join(*quadrants) for pos, quadrants in parents.items()}
+            k += 1
+        return nodes.get((0, 0), self.zero(k))
+
+    @staticmethod
+    def to_array(node: Node, x: int, y: int, shape: (int, int)) -> np.ndarray:
+        """
+        Creates the board from the quadtree, cells outside of the board are dropped
+        :param node: root of the quadtree
+        :param x: column of the top left corner of the node on the board
+        :param y: row of the top left corner of the node on the board
+        :param shape: (grid_width, grid_height)
+        :return: uint8 array [x][y]
+        """
+        board = np.zeros(shape, dtype=np.uint8)
+        stack = [(node, x, y)]
+        while stack:
+            node, x, y = stack.pop()
+            size = 1 << node.k
+            if node.n == 0 or x >= shape[0] or y >= shape[1] or x + size <= 0 or y + size <= 0:
+                continue
+            if node.k == 0:
+                board[x, y] = 1
+                continue
+            half = size >> 1
+            stack.extend(((node.nw, x, y), (node.ne, x + half, y),
+                          (node.sw, x, y + half), (node.se, x + half, y + half)))
+        return board
+
+    def advance(self, node: Node, x: int, y: int, generations: int) -> (Node, int, int):
+        """
+        Advances the node by the given number of generations - by the powers of two which sum up to it
+        :param node: root of the quadtree
+        :param x: column of the top left corner of the node
+        :param y: row of the top left corner of the node
+        :param generations: number of generations
+        :return: new root with the coordinates of its top left corner
+        """
+        j = 0
+        while generations:
+            if generations & 1:
+                # the pattern has to stay in the inner half of the node, so it cannot escape it in 2^j generations
+                while node.k < j + 2 or self.inner(node).n != node.n:
+                    x, y = x - (1 << (node.k - 1)), y - (1 << (node.k - 1))
+                    node = self.centre(node)
+                node = self.successor(self.centre(node), j)
+                len(self.nodes) > self.max_nodes and self.collect(node)
+            generations >>= 1
+            j += 1
+        return node, x, y
+
+    def collect(self, *roots: Node):
+        """
+        Removes the nodes which are not reachable from the given roots and forgets the computed results
+        """
+        keep = set()
+        stack = list(roots) + self.zeros
+        while stack:
+            node = stack.pop()
+            if node.k and node not in keep:
+                keep.add(node)
+                stack.extend((node.nw, node.ne, node.sw, node.se))
+        self.nodes = {key: node for key, node in self.nodes.items() if node in keep}
+        self.results.clear()
+        self.blocks.clear()
+
+    def step(self, board: np.ndarray, generations: int = 1) -> np.ndarray:
+        node, x, y = self.advance(self.from_array(board), 0, 0, generations)
+        return self.to_array(node, x, y, board.shape)
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        return self.step(board)
@@ -0,0 +1,185 @@
+from Settings import *
+from Engine import create_engine
+from Patterns import read_pattern, write_pattern, place_pattern, fit_pattern
+from Stats import Stats
+from Recorder import Recorder
+from time import perf_counter
+from contextlib import nullcontext
+import csv
+import os
+
+
+class Headless:
+    def __init__(self, cell_size: int = CELL_SIZE, width: int = WIDTH, height: int = HEIGHT, file: str = None,
+                 universe: (int, int) = UNIVERSE, engine: str = ENGINE, generations: int = GENERATIONS,
+                 seed: int = None, workers: int = PARALLEL_WORKERS, stats_file: str = None,
+                 output: str = None, cycles: bool = False, record: str = None, stride: int = RECORD_STRIDE,
+                 backpressure: bool = not HEADLESS_RECORD_DROP):
+        """
+        Runs the simulation without the window and the event timers - as fast as possible
+        The size of the universe is calculated the same way as in the GameOfLife
+        :param cell_size: Length of the side of a square cell (px)
+        :param width: Screen width (px)
+        :param height: Screen height (px)
+        :param file: path to the pattern file or None - then the grid is randomized
+        :param universe: size of the universe (columns, rows), None means the number of cells which fit into the window
+        :param engine: name of the engine used to compute the next generations (one of the keys of Engine.ENGINES)
+        :param generations: number of generations to compute
+        :param seed: seed of the random grid, None means random seed
+        :param workers: number of processes used by the parallel engine
+        :param stats_file: path to the CSV file to which the statistics of every generation are written, or None
+        :param output: path to the file to which the last board is saved (format by the extension), or None
+        :param cycles: detect the cycles - when the board has stabilized, the rest of the cycles is skipped
+        :param record: path to the GIF file or the directory of the PNG files to which every stride-th generation is
+        recorded, or None
+        :param stride: every stride-th generation is recorded
+        :param backpressure: wait for the writer of the recording when its queue is full instead of dropping the frames
+        """
+        self.engine = create_engine(engine, workers)
+        self.generations = generations
+        self.stats_file = stats_file
+        self.output = output
+        self.cycles = cycles
+        self.record, self.stride, self.backpressure = record, max(1, stride), backpressure
+        self.recorder = None
+        self.stabilized = self.period = None
+        self.skipped = 0  # generations skipped by the cycle detection (not computed)
+        self.window = {'cell_size': cell_size, 'width': width, 'height': height, 'file': file, 'universe': universe,
+                       'engine': engine, 'workers': workers}
+        height -= MENU_HEIGHT
+        pattern = read_pattern(file) if file else None
+        if pattern is not None and not universe:
+            cell_size = fit_pattern(pattern, width, height)
+            if cell_size < MIN_CELL_SIZE:
+                quit(f"Cell size is too small: '{cell_size}' change min: '{MIN_CELL_SIZE} or modify num of rows/cols!")
+        shape = universe or (int(width / cell_size), int(height / cell_size))
+        if pattern is not None:
+            self.board = place_pattern(pattern, *shape)
+        else:
+            self.board = np.random.default_rng(seed).integers(0, 2, shape, dtype=np.uint8)
+
+    def run(self) -> dict:
+        """
+        Computes all the generations and prints the report
+        :return: dictionary with the results
+        """
+        self.recorder = self.record and Recorder(self.record, self.stride, drop=not self.backpressure)
+        self.skipped = 0
+        start = perf_counter()
+        if self.stats_file or self.cycles:
+            self.board = self.step_tracked()
+        elif self.recorder:
+            self.board = self.step_recorded()
+        else:
+            self.board = self.engine.step(self.board, self.generations)
+        elapsed = perf_counter() - start
+        self.engine.parallel and self.engine.close()
+        self.recorder and self.recorder.close(wait=True)
+        self.output and write_pattern(self.board, self.output)
+
+        # the speed is measured only by the computed generations, the skipped ones are reported separately
+        simulated = self.generations - self.skipped
+        results = {'engine': self.engine.name,
+                   'workers': self.engine.workers if self.engine.parallel else 1,
+                   'grid': f'{self.board.shape[0]}x{self.board.shape[1]}',
+                   'generations': self.generations,
+                   'simulated': simulated,
+                   'skipped': self.skipped,
+                   'time': elapsed,
+                   'gens_per_sec': simulated / elapsed if elapsed else float('inf'),
+                   'cells_per_sec': simulated * self.board.size / elapsed if elapsed else float('inf'),
+                   'population': int(self.board.sum(dtype=np.int64)),
+                   'stabilized': self.stabilized,
+                   'period': self.period}
+        print(f"engine: {results['engine']}  workers: {results['workers']}  grid: {results['grid']}  "
+              f"generations: {results['generations']}"
+              f"{f'  (simulated: {simulated}, skipped: {self.skipped})' if self.skipped else ''}\n"
+              f"time: {results['time']:.3f} s  gens/sec: {results['gens_per_sec']:.1f}  "
+              f"cells/sec: {results['cells_per_sec']:.0f}  population: {results['population']}")
+        self.period and print(f'stabilized at generation {self.stabilized} with period {self.period}')
+        return results
+
+    def step_tracked(self) -> np.ndarray:
+        """
+        Computes the generations one by one and writes the statistics of every generation into the CSV file
+        When the cycle detection is on and the board has stabilized, only the rest of the last cycle is computed
+        :return: the last board
+        """
+        board = self.board
+        stats = Stats(board, self.cycles)
+        self.recorder and self.recorder.record(0, board)
+        with open(self.stats_file, 'w', newline='') if self.stats_file else nullcontext() as f:
+            writer = f and csv.DictWriter(f, Stats.FIELDS)
+            writer and writer.writeheader()
+            writer and writer.writerow(stats.row())
+            generation = 0
+            while generation < self.generations:
+                new = self.engine.step(board, 1)
+                stabilized = stats.step(board, new)
+                board, generation = new, generation + 1
+                writer and writer.writerow(stats.row())
+                self.recorder and self.recorder.record(generation, board)
+                if stabilized:
+                    self.stabilized, self.period = stats.cycles.stabilized, stats.cycles.period
+                    if self.cycles:
+                        # the board repeats every period generations
+                        rest = (self.generations - generation) % self.period
+                        self.skipped = self.generations - generation - rest
+                        board = self.engine.step(board, rest) if rest else board
+                        break
+        return board
+
+    def step_recorded(self) -> np.ndarray:
+        """
+        Computes the generations by the stride and hands every stride-th board to the recorder
+        :return: the last board
+        """
+        board = self.board
+        self.recorder.record(0, board)
+        for generation in range(0, self.generations, self.stride):
+            generations = min(self.stride, self.generations - generation)
+            board = self.engine.step(board, generations)
+            self.recorder.record(generation + generations, board)
+        return board
+
+    def startup(self, sizes: tuple = STARTUP_SIZES) -> dict:
+        """
+        Measures the latency of the window with the dummy video driver (no window is shown) - the startup is the
+        constructor and the first frame, every resize is the handling of the resize event and the next frame. All the
+        sizes are measured twice - first with the cold caches (fonts, fitted font sizes), then with the warm ones.
+        :param sizes: sizes of the window (px) to which it is resized
+        :return: dictionary with the startup time and the list of the resize times (s)
+        """
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        from GameOfLife import GameOfLife
+        start = perf_counter()
+        game = GameOfLife(history=0, **self.window)
+        game.draw()
+        results = {'startup': perf_counter() - start, 'resize': []}
+        print(f"startup: {results['startup'] * 1000:.1f} ms")
+        for size in sizes * 2:
+            pg.event.post(pg.event.Event(VIDEORESIZE, w=size[0], h=size[1]))
+            start = perf_counter()
+            game.handle_events()
+            game.draw()
+            results['resize'].append(perf_counter() - start)
+            print(f"resize to {size[0]}x{size[1]}: {results['resize'][-1] * 1000:.1f} ms")
+        game.engine.parallel and game.engine.close()
+        return results
+
+    def scale(self, max_workers: int) -> list:
+        """
+        Measures the speed-up of the parallel engine - the same board is computed with 1 to max_workers processes
+        :param max_workers: the highest number of processes
+        :return: list of the results of every run
+        """
+        board = self.board
+        results = []
+        for workers in range(1, max_workers + 1):
+            self.engine, self.board = create_engine('parallel', workers), board
+            results.append(self.run())
+        print('workers  gens/sec  speed-up')
+        for result in results:
+            print(f"{result['workers']:>7}  {result['gens_per_sec']:>8.1f}  "
+                  f"{result['gens_per_sec'] / results[0]['gens_per_sec']:>7.2f}x")
+        return results
@@ -0,0 +1,92 @@
+from Settings import np, HISTORY_BUDGET, HISTORY_KEYFRAME, HISTORY_MAX_CELLS
+from collections import deque
+import zlib
+
+
+class History:
+    """
+    Bounded history of the shown boards - every HISTORY_KEYFRAME-th board is stored whole (keyframe), the others as
+    the XOR with the previous board, all of them bit-packed and compressed. The history is split into segments starting
+    with a keyframe and when it takes more than the budget, the oldest segments are dropped, so the memory stays flat.
+    Restoring a board decompresses at most one keyframe and the deltas of its segment.
+    Only the bit-packed last board is kept (the deltas are computed on the packed bits) and the data is compressed with
+    the run length strategy of zlib, which is faster than the default one and smaller on the XOR deltas. The boards of
+    more than max_cells cells are not recorded at all (the history would slow down every shown generation).
+    """
+
+    def __init__(self, budget: int = HISTORY_BUDGET, keyframe: int = HISTORY_KEYFRAME,
+                 max_cells: int = HISTORY_MAX_CELLS):
+        """
+        :param budget: maximal size of the compressed boards (bytes)
+        :param keyframe: number of the boards in the segment (the keyframe and the deltas)
+        :param max_cells: bigger boards are not recorded, the history is cleared when one of them is shown
+        """
+        self.budget = budget
+        self.keyframe = keyframe
+        self.max_cells = max_cells
+        self.segments = deque()  # lists of (generation, compressed data), the first entry is the keyframe
+        self.shapes = deque()  # shape of the boards of every segment
+        self.size = 0
+        self.last = None  # packed bits of the last recorded board
+
+    def count(self) -> int:
+        """
+        Returns the number of the recorded boards
+        """
+        return sum(len(segment) for segment in self.segments)
+
+    def record(self, generation: int, board: np.ndarray):
+        """
+        Adds the board to the history
+        :param generation: generation of the board
+        :param board: uint8 array [x][y]
+        """
+        if board.size > self.max_cells:
+            self.segments.clear()
+            self.shapes.clear()
+            self.size, self.last = 0, None
+            return
+        bits = np.packbits(board)
+        if self.last is None or self.shapes[-1] != board.shape or len(self.segments[-1]) >= self.keyframe:
+            self.segments.append([])
+            self.shapes.append(board.shape)
+            data = bits
+        else:
+            data = bits ^ self.last
+        compressor = zlib.compressobj(1, strategy=zlib.Z_RLE)
+        entry = (generation, compressor.compress(data) + compressor.flush())
+        self.segments[-1].append(entry)
+        self.size += len(entry[1])
+        self.last = bits
+
+        while self.size > self.budget and len(self.segments) > 1:
+            self.size -= sum(len(data) for _, data in self.segments.popleft())
+            self.shapes.popleft()
+
+    def rewind(self, board: np.ndarray, steps: int = 1) -> (int, np.ndarray):
+        """
+        Returns to the board recorded the given number of steps back, the newer boards are dropped from the history.
+        When the board was modified since it was recorded (mouse), the last recorded board is the first step back.
+        :param board: the current board
+        :param steps: number of the recorded boards to go back
+        :return: (generation, board) or None when the history is empty
+        """
+        if self.last is None:
+            return None
+        steps -= board.shape != self.shapes[-1] or not np.array_equal(np.packbits(board), self.last)
+
+        # drop the newer entries, then the last remaining one is restored
+        for _ in range(min(steps, self.count() - 1)):
+            segment = self.segments[-1]
+            self.size -= len(segment.pop()[1])
+            if not segment:
+                self.segments.pop()
+                self.shapes.pop()
+
+        shape, segment = self.shapes[-1], self.segments[-1]
+        size = shape[0] * shape[1]
+        bits = np.zeros(-(-size // 8), dtype=np.uint8)
+        for _, data in segment:
+            bits ^= np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        self.last = bits
+        return segment[-1][0], np.unpackbits(bits, count=size).reshape(shape)
@@ -0,0 +1,112 @@
+from Settings import np, Path, LUT_CACHE
+from Engine import Engine
+
+_table = None  # loaded only when the engine computes the first generation
+_pairs = None  # table of the pairs of cells, derived from the _table
+
+
+def build_table() -> np.ndarray:
+    """
+    Computes the next state of the 2x2 center of every 4x4 neighborhood
+    Bit 4 * y + x of the index is the cell (x, y) of the neighborhood, bit 2 * y + x of the value is the next state of
+    the center cell (1 + x, 1 + y).
+    :return: uint8 array of 65536 entries
+    """
+    cells = ((np.arange(1 << 16, dtype=np.uint32)[:, None] >> np.arange(16, dtype=np.uint32)) & 1).reshape(-1, 4, 4)
+    table = np.zeros(1 << 16, dtype=np.uint8)
+    for y in (0, 1):
+        for x in (0, 1):
+            center = cells[:, 1 + y, 1 + x]
+            neighbors = cells[:, y:y + 3, x:x + 3].sum(axis=(1, 2)) - center
+            table |= (((neighbors == 3) | (center & (neighbors == 2))).astype(np.uint8) << (2 * y + x))
+    return table
+
+
+def lookup_table() -> np.ndarray:
+    """
+    Returns the table - it is built only the first time and then cached in the LUT_CACHE file
+    """
+    global _table
+    if _table is None:
+        try:
+            _table = np.load(LUT_CACHE)
+            if _table.shape != (1 << 16,) or _table.dtype != np.uint8:
+                raise ValueError
+        except (OSError, ValueError):
+            _table = build_table()
+            try:
+                Path(LUT_CACHE).parent.mkdir(parents=True, exist_ok=True)
+                np.save(LUT_CACHE, _table)
+            except OSError:
+                pass  # the table is just built again next time
+    return _table
+
+
+def pairs_table() -> np.ndarray:
+    """
+    Returns the next states of the pairs of cells (x, y) and (x, y + 1) for every 3x4 neighborhood - bit 4 * i + j of
+    the index is the cell (x - 1 + i, y - 1 + j), the value is the little endian uint16 of the two bytes of the new
+    states (on any host, so it can be written to the board at once). It is derived from the 4x4 table (the fourth
+    column is empty).
+    :return: little endian uint16 array of 4096 entries
+    """
+    global _pairs
+    if _pairs is None:
+        index = np.arange(1 << 12, dtype=np.uint32)
+        full = np.zeros(1 << 12, dtype=np.uint32)
+        for i in range(3):
+            for j in range(4):
+                full |= ((index >> (4 * i + j)) & 1) << (4 * j + i)
+        blocks = lookup_table()[full]
+        _pairs = ((blocks & 1).astype(np.uint16) | (((blocks >> 2) & 1).astype(np.uint16) << 8)).astype('<u2')
+    return _pairs
+
+
+class LookupEngine(Engine):
+    """
+    Engine which steps the board by the pairs of cells in y - the 3x4 neighborhood of every pair is packed into a 12 bit
+    index and the next states of the pair are looked up in the precomputed table (numpy take), which fits into the L1
+    cache, and written as one uint16. The pairs of the cells of the padded board are read as uint16 words, so all the
+    operations are contiguous, and the intermediate arrays are kept between the generations (the big temporary arrays
+    would be allocated and faulted in every generation).
+    """
+    name = 'lut'
+
+    def __init__(self):
+        self.buffers = None  # padded board, pairs, nibbles, rows of the indices and the indices for the board shape
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        table = pairs_table()
+        width, height = board.shape
+        pairs_y = -(-height // 2)
+        if self.buffers is None or self.buffers[0].shape != (width + 2, 2 * pairs_y + 2):
+            self.buffers = (np.empty((width + 2, 2 * pairs_y + 2), dtype=np.uint8),
+                            np.empty((width + 2, pairs_y + 1), dtype=np.uint16),
+                            np.empty((width + 2, pairs_y), dtype=np.uint16),
+                            np.empty((width, pairs_y), dtype=np.uint16),
+                            np.empty((width, pairs_y), dtype=np.intp))
+        padded, pairs, nibbles, rows, index = self.buffers
+
+        # the board with the frame of one cell around (wraps around the edges), completed to the even height
+        padded[1:width + 1, 1:height + 1] = board
+        padded[0, 1:height + 1] = board[-1]
+        padded[width + 1, 1:height + 1] = board[0]
+        for y in (0, *range(height + 1, 2 * pairs_y + 2)):
+            padded[:, y] = padded[:, 1 + (y - 1) % height]
+
+        # the cells 2j and 2j + 1 of the column as the bits 0 and 1 (the cells are the bytes of the uint16 word)
+        cells = padded.view('<u2')
+        np.right_shift(cells, 7, out=pairs)
+        pairs |= cells
+        pairs &= 3
+        # the 4 cells of the column of the neighborhood are two neighbouring pairs, the 3 columns make the index
+        np.left_shift(pairs[:, 1:], 2, out=nibbles)
+        nibbles |= pairs[:, :-1]
+        np.left_shift(nibbles[2:], 4, out=rows)
+        rows |= nibbles[1:-1]
+        rows <<= 4
+        rows |= nibbles[:-2]
+        index[...] = rows  # take converts any other type of the indices to the new array
+
+        new = table.take(index).view(np.uint8)
+        return new[:, :height] if height % 2 else new
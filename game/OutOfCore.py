@@ -0,0 +1,137 @@
+from Settings import *
+from BitPacked import BitPackedEngine, pack
+from Patterns import BINARY_MAGIC, BINARY_HEADER, read_pattern, place_pattern
+from time import perf_counter
+import shutil
+import os
+
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+class OutOfCore:
+    """
+    Runs the simulation of the board which doesn't have to fit into the memory - the board is kept in the file in the
+    binary pattern format (rows of 64 bit words) mapped into the memory. Every generation is computed by the bands of
+    rows (with one row above and below) with the bit-packed engine and written into the second mapped file, then the
+    files are swapped. Only one band is in the memory at once, the pages of the files are managed by the system.
+    The file is readable by the pattern loader at any time between the generations (the format is the same).
+    """
+
+    def __init__(self, file: str, universe: (int, int) = None, pattern: str = None, seed: int = None,
+                 band: int = OUT_OF_CORE_BAND, snapshots: int = 0):
+        """
+        :param file: path to the binary board file - it is created when it does not exist
+        :param universe: size of the created board (columns, rows)
+        :param pattern: path to the pattern file placed in the center of the created board, None means random soup
+        :param seed: seed of the random soup, None means random seed
+        :param band: size of the band of the packed rows computed at once (bytes)
+        :param snapshots: the board is copied to the file_<generation>.bin every that many generations (0 = never)
+        """
+        self.file = file
+        self.scratch = file + '.next'
+        self.snapshots = snapshots
+        self.generation = 0
+        self.population = None
+        if not Path(file).exists():
+            universe or quit(f"The board file '{file}' does not exist, set the size of the universe to create it")
+            self.create(universe, pattern, seed)
+        with open(file, 'rb') as f:
+            header = f.read(BINARY_HEADER)
+        if header[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            quit(f"'{file}' is not a binary pattern file")
+        self.width, self.height = np.frombuffer(header[len(BINARY_MAGIC):], dtype='<u4').tolist()
+        self.words = -(-self.width // 64)
+        if Path(file).stat().st_size < BINARY_HEADER + self.height * self.words * 8:
+            quit(f"the '{file}' file is truncated")
+        self.band = max(1, band // (self.words * 8))
+
+    def open(self, file: str, create: bool = False) -> np.memmap:
+        """
+        Maps the packed rows of the board file into the memory
+        :param file: path to the board file
+        :param create: create the file (of the size of this board) first
+        :return: uint64 array [y][word]
+        """
+        if create:
+            with open(file, 'wb') as f:
+                f.write(BINARY_MAGIC + np.array((self.width, self.height), dtype='<u4').tobytes())
+                f.truncate(BINARY_HEADER + self.height * self.words * 8)
+        return np.memmap(file, dtype='<u8', mode='r+', offset=BINARY_HEADER, shape=(self.height, self.words))
+
+    def create(self, universe: (int, int), pattern: str = None, seed: int = None):
+        """
+        Creates the board file with the pattern (which has to fit into the memory) or with the random soup, which is
+        generated by the bands
+        """
+        self.width, self.height = universe
+        self.words = -(-self.width // 64)
+        rows = self.open(self.file, create=True)
+        if pattern:
+            rows[:] = pack(place_pattern(read_pattern(pattern), self.width, self.height))
+        else:
+            rng = np.random.default_rng(seed)
+            band = max(1, OUT_OF_CORE_BAND // (self.words * 8))
+            for y in range(0, self.height, band):
+                words = rng.integers(0, np.iinfo(np.uint64).max, (min(band, self.height - y), self.words),
+                                     dtype=np.uint64, endpoint=True)
+                rows[y:y + band] = BitPackedEngine.clear_padding(words, self.width)
+        rows.flush()
+
+    def next_generation(self, src: np.memmap, dst: np.memmap) -> int:
+        """
+        Computes the next generation of the src rows into the dst rows band by band
+        :return: population of the new generation
+        """
+        population = 0
+        for y in range(0, self.height, self.band):
+            end = min(y + self.band, self.height)
+            rows = np.concatenate((src[(y - 1) % self.height][None], src[y:end], src[end % self.height][None]))
+            new = BitPackedEngine.next_rows(rows.astype(np.uint64, copy=False), self.width)[1:-1]
+            dst[y:end] = new
+            population += int(POPCOUNT[new.view(np.uint8)].sum(dtype=np.int64))
+        return population
+
+    def step(self, generations: int = 1) -> int:
+        """
+        Computes the generations, the board file contains the last one afterwards
+        :return: population of the last generation
+        """
+        src, dst = self.open(self.file), self.open(self.scratch, create=True)
+        files = (self.file, self.scratch)
+        for _ in range(generations):
+            self.population = self.next_generation(src, dst)
+            src, dst, files = dst, src, files[::-1]
+            self.generation += 1
+            if self.snapshots and not self.generation % self.snapshots:
+                src.flush()
+                shutil.copyfile(files[0], f'{Path(self.file).with_suffix("")}_{self.generation}.bin')
+        src.flush()
+        del src, dst  # unmaps the files
+        if files[0] != self.file:
+            os.replace(self.scratch, self.file)
+        else:
+            os.remove(self.scratch)
+        return self.population
+
+    def run(self, generations: int = GENERATIONS) -> dict:
+        """
+        Computes the generations and prints the report
+        :return: dictionary with the results
+        """
+        start = perf_counter()
+        self.step(generations)
+        elapsed = perf_counter() - start
+        cells = self.width * self.height
+        results = {'engine': 'out-of-core',
+                   'grid': f'{self.width}x{self.height}',
+                   'generations': generations,
+                   'time': elapsed,
+                   'gens_per_sec': generations / elapsed if elapsed else float('inf'),
+                   'cells_per_sec': generations * cells / elapsed if elapsed else float('inf'),
+                   'population': self.population,
+                   'band': self.band}
+        print(f"engine: {results['engine']}  grid: {results['grid']}  generations: {results['generations']}  "
+              f"band: {results['band']} rows\n"
+              f"time: {results['time']:.3f} s  gens/sec: {results['gens_per_sec']:.1f}  "
+              f"cells/sec: {results['cells_per_sec']:.0f}  population: {results['population']}")
+        return results
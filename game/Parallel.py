@@ -0,0 +1,104 @@
+from Settings import np, PARALLEL_WORKERS
+from Engine import Engine
+from BitPacked import BitPackedEngine, pack, unpack
+from multiprocessing import Pool, shared_memory
+
+_attached = {}  # name of the shared memory -> (SharedMemory, array), in every worker process
+
+
+def _attach(names: (str, str), shape: (int, int)) -> list:
+    """
+    Returns both buffers of the engine as arrays, attaches the shared memory only the first time
+    """
+    if any(name not in _attached for name in names):
+        for shm, _ in _attached.values():
+            shm.close()
+        _attached.clear()
+        for name in names:
+            shm = shared_memory.SharedMemory(name=name)
+            _attached[name] = (shm, np.ndarray(shape, dtype=np.uint64, buffer=shm.buf))
+    return [_attached[name][1] for name in names]
+
+
+def _step_band(names: (str, str), shape: (int, int), width: int, src: int, y0: int, y1: int):
+    """
+    Computes the next generation of the rows [y0, y1) from the buffer src and writes them to the other buffer
+    The rows above and below the band (halo) are read from the shared buffer as well, so the band wraps around.
+    """
+    buffers = _attach(names, shape)
+    band = buffers[src].take(np.arange(y0 - 1, y1 + 1), axis=0, mode='wrap')
+    buffers[1 - src][y0:y1] = BitPackedEngine.next_rows(band, width)[1:-1]
+
+
+class ParallelEngine(Engine):
+    """
+    Engine which splits the toroidal board into horizontal bands and computes them in a pool of processes.
+    The bit-packed board is kept in two shared memory buffers (current and next generation), the workers read the
+    halo rows of their bands straight from the current buffer and the buffers are swapped after every generation.
+    """
+    name = 'parallel'
+    parallel = True
+
+    def __init__(self, workers: int = PARALLEL_WORKERS):
+        """
+        :param workers: number of processes
+        """
+        self.workers = max(1, workers)
+        self.pool = None
+        self.memory = []
+        self.buffers = []
+        self.shape = None
+
+    def allocate(self, shape: (int, int)):
+        """
+        Creates the shared buffers for the packed board of the given shape (rows, words)
+        """
+        self.release()
+        size = max(1, shape[0] * shape[1] * 8)
+        self.memory = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+        self.buffers = [np.ndarray(shape, dtype=np.uint64, buffer=shm.buf) for shm in self.memory]
+        self.shape = shape
+
+    def release(self):
+        """
+        Frees the shared buffers
+        """
+        self.buffers = []
+        for shm in self.memory:
+            shm.close()
+            shm.unlink()
+        self.memory = []
+        self.shape = None
+
+    def close(self):
+        """
+        Stops the workers and frees the shared buffers
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        self.release()
+
+    def __del__(self):
+        self.close()
+
+    def step(self, board: np.ndarray, generations: int = 1) -> np.ndarray:
+        width, height = board.shape
+        rows = pack(board)
+        if self.shape != rows.shape:
+            self.allocate(rows.shape)
+        if self.pool is None:
+            self.pool = Pool(self.workers)
+        self.buffers[0][...] = rows
+
+        names = tuple(shm.name for shm in self.memory)
+        bounds = np.linspace(0, height, min(self.workers, height) + 1).astype(int).tolist()
+        src = 0
+        for _ in range(generations):
+            self.pool.starmap(_step_band, [(names, rows.shape, width, src, y0, y1)
+                                           for y0, y1 in zip(bounds, bounds[1:])])
+            src = 1 - src
+        return unpack(self.buffers[src], width)
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        return self.step(board)
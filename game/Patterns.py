@@ -0,0 +1,359 @@
+from Settings import np, PATTERN_CHUNK
+from BitPacked import pack, unpack
+import re
+
+BINARY_MAGIC = b'LIFEBIN1'  # header of the binary format: magic, width and height (uint32), then the packed rows
+BINARY_HEADER = len(BINARY_MAGIC) + 8
+LIFE_106_HEADER = b'#Life 1.06'
+LIFE_106_BOARD = b'#D board'  # comment with the size of the saved board, the coordinates are kept where they were
+FORMATS = ('txt', 'rle', 'lif', 'bin')
+
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[list(b' \t\r\n')] = True
+_POWERS = 10.0 ** np.arange(20)
+
+
+def pattern_format(file: str) -> str:
+    """
+    Recognizes the format of the pattern file by its extension (or by the header of the binary file)
+    :param file: path to the file
+    :return: one of the FORMATS
+    """
+    extension = file.rsplit('.', 1)[-1].lower()
+    if extension in ('rle', 'bin'):
+        return extension
+    if extension in ('lif', 'life'):
+        return 'lif'
+    try:
+        with open(file, 'rb') as f:
+            header = f.read(len(BINARY_MAGIC))
+    except FileNotFoundError:
+        quit(f"File '{file}' was not found!")
+    return 'bin' if header == BINARY_MAGIC else 'lif' if header.startswith(LIFE_106_HEADER[:5]) else 'txt'
+
+
+def read_pattern(file: str) -> np.ndarray:
+    """
+    Reads the pattern from the specified file in any of the FORMATS
+    :param file: relative path from __main__.py to the file
+    :return: uint8 array [x][y] with the pattern
+    """
+    try:
+        return {'txt': read_plaintext, 'rle': read_rle, 'lif': read_life_106, 'bin': read_binary}[
+            pattern_format(file)](file)
+    except FileNotFoundError:
+        quit(f"File '{file}' was not found!")
+
+
+def write_pattern(board: np.ndarray, file: str):
+    """
+    Writes the board to the file, the format is chosen by the extension (plaintext if it is not known)
+    :param board: uint8 array [x][y]
+    :param file: path to the file
+    """
+    extension = file.rsplit('.', 1)[-1].lower()
+    {'rle': write_rle, 'lif': write_life_106, 'life': write_life_106, 'bin': write_binary}.get(
+        extension, write_plaintext)(board, file)
+
+
+def _chunks(f, separators: bytes):
+    """
+    Reads the file in chunks of PATTERN_CHUNK bytes, every chunk ends with one of the separators (or the end of file),
+    so no token is split between two chunks
+    """
+    rest = b''
+    while chunk := f.read(PATTERN_CHUNK):
+        data = rest + chunk
+        cut = max(data.rfind(bytes([separator])) for separator in separators)
+        data, rest = data[:cut + 1], data[cut + 1:]
+        if data:
+            yield data
+    if rest:
+        yield rest
+
+
+def _integers(data: bytes) -> np.ndarray:
+    """
+    Parses the whitespace separated integers at once with numpy (without creating any python object per number)
+    """
+    chars = np.frombuffer(data, dtype=np.uint8)
+    number = ~_WHITESPACE[chars]
+    if not number.any():
+        return np.zeros(0, dtype=np.int64)
+    digit = (chars >= ord('0')) & (chars <= ord('9'))
+    if (number & ~digit & (chars != ord('-'))).any():
+        raise ValueError
+    edge = np.diff(number.astype(np.int8), prepend=0, append=0)
+    starts, ends = np.flatnonzero(edge == 1), np.flatnonzero(edge == -1)  # ends are exclusive
+    positions = np.flatnonzero(digit)
+    owner = np.searchsorted(starts, positions, side='right') - 1
+    values = np.bincount(owner, weights=(chars[positions] - ord('0')) * _POWERS[ends[owner] - positions - 1],
+                         minlength=len(starts)).astype(np.int64)
+    return np.where(chars[starts] == ord('-'), -values, values)
+
+
+def read_plaintext(file: str) -> np.ndarray:
+    """
+    Reads the plaintext pattern - a living cell is marked as '1', 'o' or 'O' and a dead cell as '0', '.' or '_', rows
+    shorter than the longest one are completed with dead cells. Every row is converted at once with the lookup table.
+    :param file: relative path from __main__.py to the file
+    :return: uint8 array [x][y] with the pattern
+    """
+    lut = np.full(256, 2, dtype=np.uint8)
+    lut[list(b'1oO')], lut[list(b'0._')] = 1, 0
+    with open(file, 'rb') as f:
+        lines = [line.strip() for line in f]
+
+    rows = np.zeros((len(lines), max(map(len, lines), default=0)), dtype=np.uint8)
+    for y, line in enumerate(lines):
+        row = lut[np.frombuffer(line, dtype=np.uint8)]
+        if (row == 2).any():
+            quit(f"there is an illegal character '{chr(line[np.argmax(row == 2)])}' in the '{file}' file")
+        rows[y, :len(row)] = row
+    return rows.T  # from [y][x] to [x][y]
+
+
+def write_plaintext(board: np.ndarray, file: str):
+    """
+    Writes the board as the plaintext pattern - '1' for the living and '.' for the dead cells
+    """
+    rows = np.full((board.shape[1], board.shape[0] + 1), ord('\n'), dtype=np.uint8)
+    rows[:, :-1] = np.array([ord('.'), ord('1')], dtype=np.uint8)[board.T]
+    rows.tofile(file)
+
+
+def read_rle(file: str) -> np.ndarray:
+    """
+    Reads the pattern in the run length encoded format (header 'x = W, y = H', runs of 'b' - dead and 'o' - alive
+    cells, '$' - end of the row, '!' - end of the pattern). The runs are decoded with numpy chunk by chunk and filled
+    into the board at once, so no python object is created per cell or per run.
+    :param file: relative path from __main__.py to the file
+    :return: uint8 array [x][y] with the pattern
+    """
+    with open(file, 'rb') as f:
+        line = f.readline()
+        while line.startswith(b'#') or not line.strip():
+            if not line:
+                quit(f"there is no header in the '{file}' file")
+            line = f.readline()
+        header = re.match(rb'\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)', line)
+        if not header:
+            quit(f"there is an invalid header '{line.strip().decode(errors='replace')}' in the '{file}' file")
+        width, height = int(header[1]), int(header[2])
+
+        # the transitions between the dead and alive cells of the flat [y][x] board, summed up at the end
+        edges = np.zeros(width * height + 1, dtype=np.int8)
+        x = y = 0
+        for data in _chunks(f, b'bo$!'):
+            chars = np.frombuffer(data, dtype=np.uint8)
+            chars = chars[~_WHITESPACE[chars]]
+            digit = (chars >= ord('0')) & (chars <= ord('9'))
+            tag_positions = np.flatnonzero(~digit)
+            tags = chars[tag_positions]
+            end = np.flatnonzero(tags == ord('!'))
+            if len(end):
+                tags, tag_positions = tags[:end[0]], tag_positions[:end[0]]
+            letters = ((tags >= ord('a')) & (tags <= ord('z'))) | ((tags >= ord('A')) & (tags <= ord('Z')))
+            if not (letters | (tags == ord('$'))).all():
+                quit(f"there is an illegal character '{chr(tags[~letters & (tags != ord('$'))][0])}' "
+                     f"in the '{file}' file")
+
+            # the count of every tag is made of the digits in front of it (1 when there are none)
+            positions = np.flatnonzero(digit)
+            positions = positions[positions < (tag_positions[-1] if len(tags) else -1)]
+            owner = np.cumsum(~digit, dtype=np.int32)[positions]  # index of the tag after the digit
+            weights = (chars[positions] - ord('0')) * _POWERS[tag_positions[owner] - positions - 1]
+            counts = np.bincount(owner, weights=weights, minlength=len(tags)).astype(np.int64)
+            counts[~digit[tag_positions - 1] | (tag_positions == 0)] = 1
+
+            new_row = tags == ord('$')
+            rows = np.where(new_row, counts, 0)
+            cells = np.where(new_row, 0, counts)
+            row_of = y + np.cumsum(rows) - rows
+            done = np.cumsum(cells)  # cells of the chunk up to and including the tag
+            last_row = np.maximum.accumulate(np.where(new_row, np.arange(len(tags)), -1))  # the last '$' so far
+            column_of = done - cells - np.where(last_row >= 0, done[np.maximum(last_row, 0)], -x)
+
+            alive = letters & (tags != ord('b'))
+            starts, lengths, row_of = column_of[alive], counts[alive], row_of[alive]
+            inside = (row_of < height) & (starts < width)
+            starts, lengths, row_of = starts[inside], lengths[inside], row_of[inside]
+            stops = np.minimum(starts + lengths, width)
+            edges[row_of * width + starts] += 1
+            edges[row_of * width + stops] -= 1
+
+            if len(tags):
+                y += int(rows.sum())
+                x = int(done[-1] - done[last_row[-1]]) if last_row[-1] >= 0 else x + int(done[-1])
+            if len(end):
+                break
+    return np.cumsum(edges[:-1], dtype=np.int8).view(np.uint8).reshape(height, width).T
+
+
+def write_rle(board: np.ndarray, file: str):
+    """
+    Writes the board in the run length encoded format. The board is encoded with numpy by the bands of rows, the runs
+    are formatted into the buffer at once and the lines are broken between the runs (at most 70 characters long).
+    """
+    width, height = board.shape
+    band = max(1, PATTERN_CHUNK // max(1, width))
+    last_row = offset = line = 0  # the last row with any alive cell, length of the runs written so far and its line
+    with open(file, 'wb') as f:
+        f.write(f'x = {width}, y = {height}, rule = B3/S23\n'.encode())
+        for y in range(0, height, band):
+            rows = board[:, y:y + band].T.view(np.int8)
+            # the borders of the runs of the alive cells - every row is completed with the dead cells on both sides
+            ys, xs = np.divmod(np.flatnonzero(np.diff(rows, axis=1, prepend=0, append=0)), width + 1)
+            ys, begins, ends = ys[::2] + y, xs[::2], xs[1::2]
+            if not len(ys):
+                continue
+            first = np.r_[True, ys[1:] != ys[:-1]]  # the first run of the row
+            previous_end = np.where(first, 0, np.r_[0, ends[:-1]])
+            rows_ended = np.where(first, ys - np.r_[last_row, ys[:-1]], 0)
+            last_row = int(ys[-1])
+
+            # every run of the alive cells is preceded by the ended rows and the dead cells, empty tokens are dropped
+            counts = np.stack((rows_ended, begins - previous_end, ends - begins), axis=1).ravel()
+            tags = np.tile(np.array([ord('$'), ord('b'), ord('o')], dtype=np.uint8), len(ys))
+            counts, tags = counts[counts > 0], tags[counts > 0]
+            digits = np.where(counts > 1, np.searchsorted(_POWERS, counts, side='right'), 0)
+
+            sizes = digits + 1
+            ends = offset + np.cumsum(sizes)
+            lines = (ends - 1) // 60  # the tokens are at most 10 characters long, so no line is longer than 70
+            breaks = np.diff(lines, prepend=line) > 0
+            offset, line = int(ends[-1]), int(lines[-1])
+
+            sizes += breaks
+            starts = np.cumsum(sizes) - sizes
+            buffer = np.empty(int(sizes.sum()), dtype=np.uint8)
+            buffer[starts[breaks]] = ord('\n')
+            starts += breaks
+            buffer[starts + digits] = tags
+            for digit in range(int(digits.max())):
+                has = digits > digit
+                buffer[starts[has] + digit] = counts[has] // _POWERS[digits[has] - digit - 1].astype(np.int64) % 10 \
+                    + ord('0')
+            buffer.tofile(f)
+        f.write(b'!\n')
+
+
+def read_life_106(file: str) -> np.ndarray:
+    """
+    Reads the pattern in the Life 1.06 format - the coordinates 'x y' of the living cells, one per line. The
+    coordinates are moved by the '#P x y' offset, if the file has one. The board saved by write_life_106 is restored
+    with its size and the cells in their places, any other pattern is moved so its top left corner is (0, 0).
+    :param file: relative path from __main__.py to the file
+    :return: uint8 array [x][y] with the pattern
+    """
+    size, offset = None, (0, 0)
+    with open(file, 'rb') as f:
+        line = f.readline()
+        while line.startswith(b'#'):
+            try:
+                if line.startswith(LIFE_106_BOARD):
+                    size = tuple(int(number) for number in line[len(LIFE_106_BOARD):].split())
+                elif line.startswith(b'#P'):
+                    offset = tuple(int(number) for number in line[2:].split())
+            except ValueError:
+                quit(f"there is an invalid line '{line.strip().decode(errors='replace')}' in the '{file}' file")
+            line = f.readline()
+        try:
+            coordinates = np.concatenate([_integers(line)] + [_integers(data) for data in _chunks(f, b'\n')])
+        except ValueError:
+            quit(f"there is an illegal character in the '{file}' file")
+    if len(coordinates) % 2:
+        quit(f"there is an odd number of coordinates in the '{file}' file")
+    if len(size or (0, 0)) != 2 or len(offset) != 2:
+        quit(f"there is an invalid '{LIFE_106_BOARD.decode()}' or '#P' line in the '{file}' file")
+    xs, ys = coordinates[::2] + offset[0], coordinates[1::2] + offset[1]
+    if size:
+        pattern = np.zeros(size, dtype=np.uint8)
+        inside = (xs >= 0) & (xs < size[0]) & (ys >= 0) & (ys < size[1])
+        pattern[xs[inside], ys[inside]] = 1
+        return pattern
+    if not len(coordinates):
+        return np.zeros((1, 1), dtype=np.uint8)
+
+    pattern = np.zeros((xs.max() - xs.min() + 1, ys.max() - ys.min() + 1), dtype=np.uint8)
+    pattern[xs - xs.min(), ys - ys.min()] = 1
+    return pattern
+
+
+def write_life_106(board: np.ndarray, file: str):
+    """
+    Writes the living cells of the board in the Life 1.06 format. The coordinates are formatted into the buffer with
+    numpy by the bands of columns, so no python object is created per cell. The size of the board is written in the
+    LIFE_106_BOARD comment, so the board is read back unchanged (other programs skip the comment).
+    """
+    band = max(1, PATTERN_CHUNK // max(1, board.shape[1]))
+    with open(file, 'wb') as f:
+        f.write(LIFE_106_HEADER + b'\n' + LIFE_106_BOARD + f' {board.shape[0]} {board.shape[1]}\n'.encode())
+        for x in range(0, board.shape[0], band):
+            xs, ys = np.nonzero(board[x:x + band])
+            if not len(xs):
+                continue
+            numbers = np.stack((xs + x, ys), axis=1).ravel()
+            digits = np.maximum(1, np.searchsorted(_POWERS, numbers, side='right'))
+            ends = np.cumsum(digits + 1)  # every number is followed by the space or the end of the line
+            starts = ends - digits - 1
+            buffer = np.empty(int(ends[-1]), dtype=np.uint8)
+            buffer[ends - 1] = np.tile(np.array([ord(' '), ord('\n')], dtype=np.uint8), len(xs))
+            for digit in range(int(digits.max())):
+                has = digits > digit
+                buffer[starts[has] + digit] = numbers[has] // _POWERS[digits[has] - digit - 1].astype(np.int64) % 10 \
+                    + ord('0')
+            buffer.tofile(f)
+
+
+def read_binary(file: str) -> np.ndarray:
+    """
+    Reads the board in the binary format - rows of 64 bit words, the same layout as the bit-packed engine uses
+    :param file: relative path from __main__.py to the file
+    :return: uint8 array [x][y]
+    """
+    with open(file, 'rb') as f:
+        header = f.read(BINARY_HEADER)
+        if header[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            quit(f"'{file}' is not a binary pattern file")
+        width, height = np.frombuffer(header[len(BINARY_MAGIC):], dtype='<u4').tolist()
+        words = -(-width // 64)
+        rows = np.fromfile(f, dtype='<u8', count=height * words)
+    if len(rows) != height * words:
+        quit(f"the '{file}' file is truncated")
+    return unpack(rows.reshape(height, words), width)
+
+
+def write_binary(board: np.ndarray, file: str):
+    """
+    Writes the board in the binary format - header (magic, width and height) followed by the packed rows
+    """
+    with open(file, 'wb') as f:
+        f.write(BINARY_MAGIC + np.array(board.shape, dtype='<u4').tobytes())
+        pack(board).astype('<u8').tofile(f)
+
+
+def place_pattern(pattern: np.ndarray, grid_width: int, grid_height: int) -> np.ndarray:
+    """
+    Creates the board with the pattern placed in the center (or in the top left corner, if it does not fit)
+    :param pattern: uint8 array [x][y]
+    :param grid_width: number of columns of the board
+    :param grid_height: number of rows of the board
+    :return: uint8 array [x][y]
+    """
+    board = np.zeros((grid_width, grid_height), dtype=np.uint8)
+    x, y = max(0, (grid_width - pattern.shape[0]) // 2), max(0, (grid_height - pattern.shape[1]) // 2)
+    pattern = pattern[:grid_width - x, :grid_height - y]
+    board[x:x + pattern.shape[0], y:y + pattern.shape[1]] = pattern
+    return board
+
+
+def fit_pattern(pattern: np.ndarray, width: int, height: int) -> int:
+    """
+    Calculates the largest size of the cell at which the whole pattern fits on the screen
+    :param pattern: uint8 array [x][y]
+    :param width: width of the grid (px)
+    :param height: height of the grid (px)
+    :return: length of the side of a square cell (px)
+    """
+    return int(min(width / pattern.shape[0], height / pattern.shape[1]))
@@ -0,0 +1,88 @@
+from Settings import np, PROFILE_WINDOW, PROFILE_REFRESH
+from collections import deque
+from time import perf_counter
+import json
+import csv
+
+
+class Profiler:
+    """
+    Measures the time of the phases of the frame and keeps the last PROFILE_WINDOW samples of every phase, from which
+    the rolling percentiles are computed. When it is disabled, lap returns immediately, so the instrumentation can stay
+    in the main loop.
+    """
+    COLUMNS = ('phase', 'p50', 'p95', 'max', 'mean', 'count')
+
+    def __init__(self, enabled: bool = False, window: int = PROFILE_WINDOW):
+        """
+        :param enabled: measure the phases
+        :param window: number of the last samples of every phase
+        """
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # name of the phase -> deque of the durations (s)
+        self.lines = ()
+        self.refreshed = 0.0
+
+    def start(self) -> float:
+        """
+        Returns the start of the first phase of the frame
+        """
+        return perf_counter() if self.enabled else 0.0
+
+    def lap(self, name: str, start: float) -> float:
+        """
+        Records the duration of the phase which started at the start (nothing is recorded for the phases which started
+        before the profiler was enabled - their start is 0.0)
+        :param name: name of the phase
+        :param start: value returned by the start or the previous lap
+        :return: the start of the next phase
+        """
+        if not self.enabled:
+            return 0.0
+        now = perf_counter()
+        if not start:
+            return now
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(now - start)
+        return now
+
+    def report(self) -> list:
+        """
+        Returns the statistics of every phase in the order in which the phases were measured the first time
+        :return: list of dictionaries with the keys COLUMNS, the times are in milliseconds
+        """
+        rows = []
+        for name, samples in self.samples.items():
+            times = np.fromiter(samples, dtype=float, count=len(samples)) * 1000
+            p50, p95 = np.percentile(times, (50, 95))
+            rows.append(dict(zip(self.COLUMNS, (name, p50, p95, times.max(), times.mean(), len(times)))))
+        return rows
+
+    def overlay_lines(self) -> tuple:
+        """
+        Returns the lines of the overlay - they are refreshed at most every PROFILE_REFRESH seconds, so the overlay is
+        not rendered again every frame
+        """
+        now = perf_counter()
+        if now - self.refreshed >= PROFILE_REFRESH:
+            self.refreshed = now
+            self.lines = (f'{"phase":<10}{"p50":>7}{"p95":>7}{"max":>7} ms',) + tuple(
+                f'{row["phase"]:<10}{row["p50"]:>7.2f}{row["p95"]:>7.2f}{row["max"]:>7.2f}' for row in self.report())
+        return self.lines
+
+    def dump(self, file: str):
+        """
+        Writes the report to the file - JSON or CSV (chosen by the extension)
+        :param file: path to the file
+        """
+        rows = self.report()
+        with open(file, 'w', newline='') as f:
+            if file.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, self.COLUMNS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump({row.pop('phase'): row for row in rows}, f, indent=2)
@@ -0,0 +1,147 @@
+from Settings import *
+from multiprocessing import Process, Queue
+from queue import Full
+from time import perf_counter
+import struct
+import zlib
+
+
+def png_image(image: np.ndarray) -> bytes:
+    """
+    Encodes the black and white image as the 1-bit grayscale PNG
+    :param image: bool array [y][x] - True is black
+    """
+    height, width = image.shape
+    rows = np.packbits(~image, axis=1)  # 1 is white in the grayscale
+    data = np.hstack((np.zeros((height, 1), dtype=np.uint8), rows)).tobytes()  # filter type 0 before every row
+
+    def chunk(kind: bytes, content: bytes) -> bytes:
+        return struct.pack('>I', len(content)) + kind + content + struct.pack('>I', zlib.crc32(kind + content))
+
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)) + \
+        chunk(b'IDAT', zlib.compress(data, RECORD_COMPRESSION)) + chunk(b'IEND', b'')
+
+
+def gif_header(width: int, height: int) -> bytes:
+    """
+    Returns the header of the looping animated GIF with the palette of 4 colors (white, black and two unused)
+    """
+    return b'GIF89a' + struct.pack('<HHBBB', width, height, 0xF1, 0, 0) + bytes(WHITE + BLACK + WHITE + WHITE) + \
+        b'\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00'
+
+
+def gif_frame(image: np.ndarray, delay: int) -> bytes:
+    """
+    Encodes the black and white image as the frame of the animated GIF - the LZW codes are written without the
+    compression (the clear code after every two pixels keeps the codes 3 bits long), so the encoding is vectorized
+    :param image: bool array [y][x] - True is black
+    :param delay: delay after the frame (1/100 s)
+    """
+    height, width = image.shape
+    pixels = image.ravel().astype(np.uint8)
+    pixels = np.append(pixels, pixels[-1:]) if len(pixels) % 2 else pixels
+    codes = np.full((len(pixels) // 2, 3), 4, dtype=np.uint8)  # 4 is the clear code
+    codes[:, 1:] = pixels.reshape(-1, 2)
+    codes = np.append(codes.ravel()[:len(codes) * 3 - (image.size % 2)], 5)  # 5 is the end of the data
+    data = np.packbits(((codes[:, None] >> np.arange(3, dtype=np.uint8)) & 1).ravel(), bitorder='little')
+
+    # the data is split into the blocks of at most 255 bytes, each preceded by its length
+    blocks = b''.join(bytes((len(block),)) + block.tobytes() for block in np.split(data, range(255, len(data), 255)))
+    return b'\x21\xF9\x04\x04' + struct.pack('<H', delay) + b'\x00\x00' + \
+        b'\x2C' + struct.pack('<HHHHB', 0, 0, width, height, 0) + b'\x02' + blocks + b'\x00'
+
+
+def _write(queue: Queue, path: str, scale: int, fps: int):
+    """
+    Writer process - encodes the frames from the queue until None arrives
+    The frame of the GIF is cropped (or padded) to the size of the first one.
+    """
+    gif = path.lower().endswith('.gif')
+    (Path(path).parent if gif else Path(path)).mkdir(parents=True, exist_ok=True)
+    f, size, count = open(path, 'wb') if gif else None, None, 0
+    while (frame := queue.get()) is not None:
+        generation, shape, bits = frame
+        board = np.unpackbits(bits, count=shape[0] * shape[1]).reshape(shape).astype(bool)
+        image = board.T.repeat(scale, axis=0).repeat(scale, axis=1)
+        if gif:
+            if size is None:
+                size = image.shape
+                f.write(gif_header(size[1], size[0]))
+            canvas = np.zeros(size, dtype=bool)
+            canvas[:image.shape[0], :image.shape[1]] = image[:size[0], :size[1]]
+            f.write(gif_frame(canvas, max(2, round(100 / fps))))
+        else:
+            with open(Path(path) / f'{generation:010}.png', 'wb') as png:
+                png.write(png_image(image))
+        count += 1
+    if gif:
+        f.write(b'\x3B')
+        f.close()
+    print(f"Recording written: {count} frames to '{path}'")
+
+
+class Recorder:
+    """
+    Records the boards every stride generations - the boards are handed to the writer process through the bounded
+    queue and encoded there (PNG sequence into the directory, or the animated GIF when the path ends with .gif), so the
+    simulation doesn't wait for the encoding. When the queue is full, the frame is dropped or the simulation waits for
+    the writer (backpressure).
+    """
+
+    def __init__(self, path: str, stride: int = RECORD_STRIDE, queue_size: int = RECORD_QUEUE,
+                 drop: bool = RECORD_DROP, scale: int = RECORD_SCALE, fps: int = RECORD_FPS):
+        """
+        :param path: directory of the PNG files or the path to the GIF file
+        :param stride: every stride-th generation is recorded
+        :param queue_size: maximal number of the frames waiting for the writer
+        :param drop: drop the frames when the queue is full, otherwise wait for the writer
+        :param scale: size of the cell in the image (px)
+        :param fps: frame rate of the GIF
+        """
+        self.path = path
+        self.stride = max(1, stride)
+        self.drop = drop
+        self.next = 0  # generation from which the next frame is recorded
+        self.queued = self.dropped = self.waits = 0
+        self.waited = 0.0
+        self.queue = Queue(max(1, queue_size))
+        self.process = Process(target=_write, args=(self.queue, path, max(1, scale), max(1, fps)))
+        self.process.start()
+
+    def record(self, generation: int, board: np.ndarray):
+        """
+        Hands the board to the writer, when the generation reached the next multiple of the stride
+        :param generation: generation of the board
+        :param board: uint8 array [x][y]
+        """
+        if generation < self.next:
+            return
+        self.next = (generation // self.stride + 1) * self.stride
+        frame = (generation, board.shape, np.packbits(board))
+        try:
+            self.queue.put_nowait(frame)
+        except Full:
+            if self.drop:
+                self.dropped += 1
+                return
+            start = perf_counter()
+            self.queue.put(frame)
+            self.waits += 1
+            self.waited += perf_counter() - start
+        self.queued += 1
+
+    def close(self, wait: bool = False):
+        """
+        Stops the recording and reports the dropped frames or the time spent waiting for the writer, the frames
+        already queued are still written
+        :param wait: wait until the writer has finished
+        """
+        self.queue.put(None)
+        if self.drop:
+            print(f"Recording stopped: {self.queued} frames queued, {self.dropped} dropped (queue full)")
+            self.dropped and print(f"Warning: {self.dropped} of {self.queued + self.dropped} frames are missing from "
+                                   f"the recording - record with --backpressure to keep all of them")
+        else:
+            print(f"Recording stopped: {self.queued} frames queued, waited {self.waits} times for the writer "
+                  f"({self.waited:.3f} s of backpressure)")
+        wait and self.process.join()
@@ -0,0 +1,91 @@
+from Settings import pg, np, WHITE, BLACK
+
+
+class Renderer:
+    """
+    Draws the whole board at once - every cell is a single pixel of a small 8-bit surface, which is then scaled up to
+    the size of the cells. The drawing time depends on the number of pixels instead of the number of objects.
+    The pixel is the index of the state of the cell (never alive, route - dead but alive before, or the age of the alive
+    cell) and the palette gives the colors of the states, so recoloring all the cells is just the change of the palette.
+    """
+    BACKGROUND, ROUTE, ALIVE = 0, 1, 2  # ALIVE + k is the cell which has survived k generations
+    AGES = 52  # the color of the cell stops changing after that many generations
+
+    def __init__(self):
+        self.states = self.surface = self.scaled = None
+        # cells that survived become brighter (through purple until they are completely blue)
+        self.palette = [WHITE, WHITE] + [(min(5 * age, 100), 0, min(5 * age, 255)) for age in range(self.AGES)]
+        self.palette += [BLACK] * (256 - len(self.palette))
+
+    def reset(self, board: np.ndarray):
+        """
+        Sets the states of all the cells depending on the board (the route is forgotten)
+        :param board: uint8 array [x][y]
+        """
+        self.states = np.where(board.astype(bool), self.ALIVE, self.BACKGROUND).astype(np.uint8)
+
+    def recolor(self, route: (int, int, int) = WHITE, background: (int, int, int) = WHITE):
+        """
+        Changes the colors of the dead cells - all of them at once
+        :param route: color of the cells which were alive before
+        :param background: color of the cells which were never alive
+        """
+        self.palette[self.BACKGROUND], self.palette[self.ROUTE] = background, route
+        for surface in (self.surface, self.scaled):
+            surface and surface.set_palette(self.palette)
+
+    @staticmethod
+    def crop(array: np.ndarray, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """
+        Returns the copy of the rectangular region of the array [x][y] (wraps around the edges)
+        :param array: array [x][y]
+        :param x: column of the top left corner of the region
+        :param y: row of the top left corner of the region
+        :param width: number of columns of the region
+        :param height: number of rows of the region
+        """
+        return array.take(range(x, x + width), axis=0, mode='wrap').take(range(y, y + height), axis=1, mode='wrap')
+
+    def revive(self, x: int, y: int):
+        self.states[x, y] = self.ALIVE
+
+    def kill(self, x: int, y: int):
+        self.states[x, y] = self.BACKGROUND
+
+    def update(self, old: np.ndarray, new: np.ndarray, diff: np.ndarray = None) -> np.ndarray:
+        """
+        Updates the states of the cells after the generation change in one pass - cells that survived get older, born
+        cells are young and the dead ones become the route
+        :param old: board before the generation change
+        :param new: board after the generation change
+        :param diff: old ^ new when it was already computed (it is shared with the stats)
+        :return: boolean array [x][y] of the cells whose color has changed
+        """
+        diff = old ^ new if diff is None else diff
+        older = (old & new).view(bool)
+        older &= self.states < self.ALIVE + self.AGES - 1
+        self.states += older
+        self.states[(diff & new).view(bool)] = self.ALIVE
+        self.states[(diff & old).view(bool)] = self.ROUTE
+        return older | diff.view(bool)
+
+    def draw(self, target: pg.Surface, cell_size: int, x: int, y: int, width: int, height: int):
+        """
+        Draws the cells visible through the camera on the target surface, the cost depends only on the size of the view
+        :param target: surface on which the cells are drawn (from the top left corner)
+        :param cell_size: length of the side of a square cell (px)
+        :param x: column of the cell in the top left corner of the view
+        :param y: row of the cell in the top left corner of the view
+        :param width: number of columns in the view
+        :param height: number of rows in the view
+        """
+        size = (width * cell_size, height * cell_size)
+        if self.surface is None or self.surface.get_size() != (width, height):
+            self.surface = pg.Surface((width, height), depth=8)
+            self.surface.set_palette(self.palette)
+        if self.scaled is None or self.scaled.get_size() != size:
+            self.scaled = pg.Surface(size, depth=8)
+            self.scaled.set_palette(self.palette)  # the scaling copies only the indices
+        pg.surfarray.blit_array(self.surface, self.crop(self.states, x, y, width, height))
+        pg.transform.scale(self.surface, size, self.scaled)
+        target.blit(self.scaled, (0, 0))
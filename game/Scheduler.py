@@ -0,0 +1,173 @@
+from Settings import np, FPS, START_GENS_PER_SEC, TURBO_BUDGET, MAX_LAG
+from threading import Thread, Condition
+from time import perf_counter
+
+
+class Scheduler:
+    """
+    Decides how many generations are computed in the frame, independently of the frame rate.
+    In the normal mode the generations are paced by the gens_per_sec - when a frame takes longer, more generations are
+    computed at once. In the turbo mode as many generations as fit into the part of the frame (TURBO_BUDGET) are
+    computed, the number of generations per engine step grows while the steps are fast.
+    """
+    background = False
+
+    def __init__(self, engine, gens_per_sec: int = START_GENS_PER_SEC, fps: int = FPS, turbo: bool = False):
+        """
+        :param engine: engine used to compute the generations
+        :param gens_per_sec: number of generations per second in the normal mode
+        :param fps: framerate cap - the turbo mode uses TURBO_BUDGET of each frame
+        :param turbo: start in the turbo mode
+        """
+        self.engine = engine
+        self.gens_per_sec = gens_per_sec
+        self.budget = TURBO_BUDGET / fps
+        self.turbo = turbo
+        self.chunk = 1  # number of generations computed by one engine step in the turbo mode
+        self.due = 0.0  # generations which should have been computed already (normal mode)
+        self.last = self.held_at = perf_counter()  # it starts held, the game starts paused
+        self.speed = 0  # measured generations per second
+        self.counted = 0
+        self.counted_since = self.last
+
+    def count(self, generations: int):
+        """
+        Measures the speed of the simulation - it is updated once per second
+        """
+        self.counted += generations
+        now = perf_counter()
+        if now - self.counted_since >= 1:
+            self.speed = round(self.counted / (now - self.counted_since))
+            self.counted, self.counted_since = 0, now
+
+    def compute(self, board: np.ndarray) -> (np.ndarray, int):
+        """
+        Computes the generations which are due now
+        :param board: uint8 array [x][y]
+        :return: (new board, number of computed generations)
+        """
+        generations = 0
+        if self.turbo:
+            deadline = perf_counter() + self.budget
+            while perf_counter() < deadline:
+                start = perf_counter()
+                board = self.engine.step(board, self.chunk)
+                generations += self.chunk
+                elapsed = perf_counter() - start
+                if elapsed < self.budget / 8:
+                    self.chunk *= 2
+                elif elapsed > self.budget / 2 and self.chunk > 1:
+                    self.chunk //= 2
+            self.last = perf_counter()
+        else:
+            now = perf_counter()
+            # when the engine can't keep up, the simulation slows down instead of falling behind more and more
+            self.due = min(self.due + (now - self.last) * self.gens_per_sec, max(1.0, self.gens_per_sec * MAX_LAG))
+            self.last = now
+            if self.due >= 1:
+                generations = int(self.due)
+                self.due -= generations
+                board = self.engine.step(board, generations)
+        self.count(generations)
+        return board, generations
+
+    def advance(self, board: np.ndarray) -> (np.ndarray, int):
+        """
+        Called every frame while the simulation runs
+        :param board: the current board
+        :return: (new board, number of generations it is ahead of the given board)
+        """
+        return self.compute(board)
+
+    def hold(self, board: np.ndarray) -> (np.ndarray, int):
+        """
+        Stops the simulation, so the board and the engine could be used (modified) by the caller
+        :param board: the current board
+        :return: (new board, number of generations it is ahead of the given board)
+        """
+        self.held_at = perf_counter()
+        return board, 0
+
+    def release(self, board: np.ndarray):
+        """
+        Continues the simulation from the given board, the time it was held is not counted
+        :param board: the board modified while the simulation was held
+        """
+        self.last += perf_counter() - self.held_at
+
+    def close(self):
+        pass
+
+
+class BackgroundScheduler(Scheduler):
+    """
+    Computes the generations in the background thread, so the slow steps don't drop the frame rate.
+    The thread works on its own board and publishes every finished one (front buffer), the renderer takes the latest
+    published board at the start of the frame. The engine and the board are owned by the thread unless it is held.
+    """
+    background = True
+
+    def __init__(self, engine, gens_per_sec: int = START_GENS_PER_SEC, fps: int = FPS, turbo: bool = False):
+        super().__init__(engine, gens_per_sec, fps, turbo)
+        self.condition = Condition()
+        self.board = None  # the latest board computed by the thread
+        self.pending = 0  # generations computed since the last board taken by the renderer
+        self.running = self.busy = self.closed = False
+        self.thread = Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def work(self):
+        while True:
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+                while not self.running and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                self.busy = True
+                board = self.board
+
+            board, generations = self.compute(board)
+
+            with self.condition:
+                self.board = board
+                self.pending += generations
+                if not generations and self.running:
+                    # nothing is due yet - wait for the next generation (or until the thread is held)
+                    self.condition.wait((1 - self.due) / self.gens_per_sec)
+
+    def take(self, board: np.ndarray) -> (np.ndarray, int):
+        """
+        Takes the latest published board
+        """
+        if self.pending:
+            board, generations, self.pending = self.board, self.pending, 0
+            return board, generations
+        return board, 0
+
+    def advance(self, board: np.ndarray) -> (np.ndarray, int):
+        with self.condition:
+            return self.take(board)
+
+    def hold(self, board: np.ndarray) -> (np.ndarray, int):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+            while self.busy:
+                self.condition.wait()
+            super().hold(board)
+            return self.take(board)
+
+    def release(self, board: np.ndarray):
+        with self.condition:
+            super().release(board)
+            self.board = board
+            self.running = True
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
@@ -1,12 +1,13 @@
 import pygame as pg
 from pygame import RESIZABLE, DOUBLEBUF, HWSURFACE, VIDEORESIZE, QUIT, KEYDOWN, MOUSEBUTTONDOWN, SRCALPHA
 from itertools import cycle
-from random import choice
 from datetime import datetime
 from pathlib import Path
 from enum import Enum
+from os import cpu_count
+import numpy as np
 
-Action = Enum('Action', 'INIT, INCREASE, DECREASE, RANDOMIZE, CLEAR')
+Action = Enum('Action', 'RANDOMIZE, CLEAR')
 
 # Colors
 WHITE = (255, 255, 255)
@@ -29,21 +30,129 @@ HEIGHT = 720
 MIN_WIDTH = 640
 MIN_HEIGHT = 360
 MENU_HEIGHT = 40
+MENU_LINES = 25
 TITLE = 'conway\'s game of life'
 ICON = '../icon.ico'
 SAVES = '../saves/'
+PATTERNS = '../patterns/'
+SAVE_FORMAT = 'rle'  # format of the saved grids: 'txt', 'rle', 'lif' or 'bin'
+SAVE_BINARY_CELLS = 4_000_000  # larger grids are saved in the 'bin' format (the only one read in under 1 s at 10k²)
+PATTERN_CHUNK = 1 << 24  # pattern files are parsed in chunks of that many bytes
 
 CELL_SIZES = cycle([16, 32, 64, 8])
 CELL_SIZE = next(CELL_SIZES)
-MIN_CELL_SIZE = 6
+MIN_CELL_SIZE = 1
+MIN_GRID_CELL_SIZE = 4  # the additional grid is not drawn for the smaller cells
 MAX_CELL_SIZE = 200
 CHANGE_CELL_SIZE = 1
 
+# Size of the universe (columns, rows) - None means the number of cells which fit into the startup window
+UNIVERSE = None
+CAMERA_STEP = 8  # number of cells by which the view is moved with the arrow keys
+
 START_GENS_PER_SEC = 20
 MIN_GENS_PER_SEC = 1
-MAX_GENS_PER_SEC = 50
+MAX_GENS_PER_SEC = 1000
 CHANGE_GENS_PER_SEC = 1
 
+# Scheduler - in the turbo mode as many generations as fit into the part of every frame are computed, the background
+# mode computes the generations in a separate thread
+TURBO = False
+TURBO_BUDGET = 0.75  # part of the frame (1 / FPS) used by the simulation in the turbo mode
+BACKGROUND = False
+MAX_LAG = 0.1  # seconds - when the engine is slower than gens_per_sec, at most that many generations are postponed
+
+# Change tracking mode - only the regions of the changed cells are updated on the screen
+DIRTY_RECTS = False
+MAX_DIRTY_RECTS = 1000  # when more cells changed, the whole screen is updated at once
+
+# Headless mode - number of generations computed when not set by the argument
+GENERATIONS = 1000
+
+# Recording - every RECORD_STRIDE-th generation is handed to the writer process through the queue of RECORD_QUEUE
+# frames, when it is full the frame is dropped (RECORD_DROP in the window, HEADLESS_RECORD_DROP in the headless mode)
+# or the simulation waits for the writer, size of the cell
+# in the images (px), frame rate of the GIF, compression level of the PNG files and the format of the recordings
+# started with the 'v' key ('gif' or 'png' - the directory of the PNG files)
+RECORD_STRIDE = 1
+RECORD_QUEUE = 64
+RECORD_DROP = True  # the window stays responsive
+HEADLESS_RECORD_DROP = False  # every stride-th generation of the headless run is recorded
+RECORD_SCALE = 2
+RECORD_FPS = 30
+RECORD_COMPRESSION = 6
+RECORDINGS = '../recordings/'
+RECORD_FORMAT = 'gif'
+
+# Out-of-core mode - size of the band of the packed rows computed at once (bytes), the peak memory is about twenty
+# times bigger (the temporary arrays of the bit-sliced adders)
+OUT_OF_CORE_BAND = 16 << 20
+
+# Soup search - size of the random boards, number of the boards stepped together in one process and number of the
+# longest-lived boards printed
+SOUP_SIZE = (64, 64)
+SOUP_BATCH = 64
+SOUP_TOP = 10
+
+# Sizes of the window (px) to which it is resized when the latency of the startup and resize is measured
+STARTUP_SIZES = ((1280, 720), (1920, 1080), (800, 600), (640, 360))
+
+# Benchmark - generations of every case, sizes of the random soups, the patterns are placed on the grid at least
+# BENCHMARK_MIN_GRID big with BENCHMARK_MARGIN free cells, the reference engine is used only when the number of cells
+# times generations is smaller than BENCHMARK_REFERENCE_CELLS, the median of BENCHMARK_REPEATS runs is taken (every run
+# repeats the computation for at least BENCHMARK_MIN_TIME), the cases computed faster than BENCHMARK_FLOOR are not
+# compared with the baseline (they are dominated by the noise), allowed slow-down against the baseline (%)
+BENCHMARK_GENERATIONS = 100
+BENCHMARK_SIZES = (64, 256, 1024)
+BENCHMARK_MIN_GRID = 64
+BENCHMARK_MARGIN = 32
+BENCHMARK_REFERENCE_CELLS = 3_000_000
+BENCHMARK_REPEATS = 5
+BENCHMARK_MIN_TIME = 0.1  # seconds
+BENCHMARK_MAX_TIME = 1  # seconds - no more runs are started when they have taken longer together
+BENCHMARK_FLOOR = 0.002  # seconds
+BENCHMARK_TOLERANCE = 20
+
+# Lookup table engine - the table of the 4x4 neighborhoods is cached in the file
+LUT_CACHE = '../cache/lut4x4.npy'
+
+# Engine used to compute the next generations (one of the keys of Engine.ENGINES)
+ENGINE = 'numpy'
+
+# Jump by 2^k generations - computed by the HashLife engine in the background thread
+JUMP_EXPONENT = 10
+MIN_JUMP_EXPONENT = 1
+MAX_JUMP_EXPONENT = 40
+
+# Profiler - number of the last frames from which the percentiles of the phases are computed, how often the overlay is
+# refreshed (s) and the file to which the timings are dumped with the 'd' key (.json or .csv)
+PROFILE_WINDOW = 600
+PROFILE_REFRESH = 0.5
+PROFILE_FILE = 'profile.json'
+
+# Cycle detection - number of the last generations whose hashes are remembered (the longest detectable period),
+# AUTO_PAUSE pauses the game when the board has stabilized
+CYCLE_HISTORY = 1024
+AUTO_PAUSE = False
+
+# History of the shown boards for the rewind - memory budget of the compressed boards (bytes, 0 disables it), every
+# HISTORY_KEYFRAME-th board is stored whole, the others as deltas, HISTORY_SCRUB boards are skipped with the shift,
+# the boards of more than HISTORY_MAX_CELLS cells are not recorded
+HISTORY_BUDGET = 64 << 20
+HISTORY_MAX_CELLS = 4_000_000
+HISTORY_KEYFRAME = 64
+HISTORY_SCRUB = 100
+
+# HashLife - when the node cache is bigger, unused nodes are collected
+HASHLIFE_MAX_NODES = 1_000_000
+
+# Sparse engine - size of the tiles and part of the active tiles above which the whole board is computed at once
+SPARSE_TILE_SIZE = 32
+SPARSE_DENSE_RATIO = 0.5
+
+# Parallel engine - number of worker processes
+PARALLEL_WORKERS = cpu_count() or 1
+
 # Mouse buttons
 LMB = 0
 RMB = 2
@@ -53,3 +162,7 @@ WHEEL_DOWN = 5
 # Fonts
 FONT = 'calibri'
 FONT_MENU = 'arial'
+FONT_PROFILE = 'couriernew'  # monospace font of the profiler overlay
+TEXT_CACHE_SIZE = 512  # number of rendered texts kept by each text cache
+FONT_CACHE_SIZE = 256  # number of loaded fonts (name and size) and fitted font sizes (text and window size) kept
+FPS_BUCKET = 5  # the FPS in the menu is rounded, so the menu is not rendered again every frame
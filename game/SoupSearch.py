@@ -0,0 +1,110 @@
+from Settings import *
+from Cycles import zobrist, zobrist_keys, CycleDetector
+from Engine import NumpyEngine
+from multiprocessing import Pool
+from time import perf_counter
+import csv
+
+
+def search_batch(seeds: range, shape: (int, int), generations: int) -> list:
+    """
+    Steps the random boards of the seeds together as one stack, every board is retired once it has died out or
+    stabilized (its Zobrist hash repeated)
+    :param seeds: seeds of the boards - the board is the same as the random grid of the headless mode with the seed
+    :param shape: size of the boards (columns, rows)
+    :param generations: the boards still running after that many generations are retired as well
+    :return: list of the results - dictionaries with the keys SoupSearch.FIELDS
+    """
+    boards = np.stack([np.random.default_rng(seed).integers(0, 2, shape, dtype=np.uint8) for seed in seeds])
+    active = list(seeds)
+    detectors = [CycleDetector() for _ in seeds]
+    hashes = np.array([zobrist(np.flatnonzero(board)) for board in boards], dtype=np.uint64)
+    populations = boards.reshape(len(boards), -1).sum(axis=1, dtype=np.int64)
+    for detector, board_hash in zip(detectors, hashes.tolist()):
+        detector.add(0, board_hash)
+
+    engine = NumpyEngine()  # computes the whole stack at once
+    results = []
+    for generation in range(1, generations + 1):
+        new = engine.next_generation(boards)
+        changed = (new ^ boards).reshape(len(boards), -1)
+        populations = new.reshape(len(boards), -1).sum(axis=1, dtype=np.int64)
+        # the hash of every board is updated by the keys of its changed cells (np.nonzero sorts them by the board)
+        index, cells = np.nonzero(changed)
+        if len(index):
+            starts = np.flatnonzero(np.diff(index, prepend=-1))
+            hashes[index[starts]] ^= np.bitwise_xor.reduceat(zobrist_keys(cells), starts)
+        boards = new
+
+        retired = [i for i, (detector, board_hash) in enumerate(zip(detectors, hashes.tolist()))
+                   if detector.add(generation, board_hash) or not populations[i] or generation == generations]
+        if not retired:
+            continue
+        for i in retired:
+            detector = detectors[i]
+            results.append(dict(zip(SoupSearch.FIELDS, (
+                active[i], detector.stabilized if detector.period else generation, int(populations[i]),
+                detector.period if populations[i] else None))))
+        keep = np.ones(len(active), dtype=bool)
+        keep[retired] = False
+        if not keep.any():
+            break
+        boards, hashes, populations = boards[keep], hashes[keep], populations[keep]
+        active = [seed for seed, kept in zip(active, keep) if kept]
+        detectors = [detector for detector, kept in zip(detectors, keep) if kept]
+    return results
+
+
+class SoupSearch:
+    """
+    Screens the random boards (soups) for the long-lived ones - the boards are stepped in batches stacked into one 3D
+    array and the batches are spread over a pool of processes. For every board the lifetime (the generation at which
+    it died out or the cycle started), the final population and the period of the cycle are reported.
+    """
+    FIELDS = ('seed', 'lifetime', 'population', 'period')
+
+    def __init__(self, soups: int, universe: (int, int) = SOUP_SIZE, generations: int = GENERATIONS,
+                 seed: int = 0, batch: int = SOUP_BATCH, workers: int = PARALLEL_WORKERS, output: str = None):
+        """
+        :param soups: number of the boards
+        :param universe: size of every board (columns, rows)
+        :param generations: the boards are stepped at most that many generations
+        :param seed: seed of the first board, the next boards have the following seeds
+        :param batch: number of the boards stepped together
+        :param workers: number of processes
+        :param output: path to the CSV file to which the results of all the boards are written, or None
+        """
+        self.seeds = range(seed, seed + soups)
+        self.shape = universe or SOUP_SIZE
+        self.generations = generations
+        self.batch = max(1, batch)
+        self.workers = max(1, workers)
+        self.output = output
+
+    def run(self) -> list:
+        """
+        Runs all the batches and prints the longest-lived boards
+        :return: list of the results sorted by the seed
+        """
+        batches = [(self.seeds[i:i + self.batch], self.shape, self.generations)
+                   for i in range(0, len(self.seeds), self.batch)]
+        start = perf_counter()
+        if self.workers > 1 and len(batches) > 1:
+            with Pool(min(self.workers, len(batches))) as pool:
+                results = [result for batch in pool.starmap(search_batch, batches) for result in batch]
+        else:
+            results = [result for batch in batches for result in search_batch(*batch)]
+        elapsed = perf_counter() - start
+        results.sort(key=lambda result: result['seed'])
+
+        if self.output:
+            with open(self.output, 'w', newline='') as f:
+                writer = csv.DictWriter(f, self.FIELDS)
+                writer.writeheader()
+                writer.writerows(results)
+        print(f"soups: {len(results)}  grid: {self.shape[0]}x{self.shape[1]}  batch: {self.batch}  "
+              f"workers: {self.workers}\ntime: {elapsed:.3f} s  soups/sec: {len(results) / elapsed:.1f}")
+        print(f"{'seed':>10}{'lifetime':>10}{'population':>12}{'period':>8}")
+        for result in sorted(results, key=lambda result: -result['lifetime'])[:SOUP_TOP]:
+            print(f"{result['seed']:>10}{result['lifetime']:>10}{result['population']:>12}{result['period'] or '-':>8}")
+        return results
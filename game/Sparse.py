@@ -0,0 +1,104 @@
+from Settings import np, SPARSE_TILE_SIZE, SPARSE_DENSE_RATIO
+from Engine import Engine, NumpyEngine
+
+
+class SparseEngine(Engine):
+    """
+    Engine which evaluates only the active tiles - the tiles in which some cells changed in the last generation and
+    the tiles next to them, if the changes were on their border. Cost of the generation scales with the activity
+    instead of the area, so for example a glider costs almost nothing even on a huge board.
+    """
+    name = 'sparse'
+
+    def __init__(self, tile_size: int = SPARSE_TILE_SIZE, dense_ratio: float = SPARSE_DENSE_RATIO):
+        """
+        :param tile_size: length of the side of a square tile (cells)
+        :param dense_ratio: when a bigger part of the tiles is active, the whole board is computed at once
+        """
+        self.tile_size = tile_size
+        self.dense_ratio = dense_ratio
+        self.dense = NumpyEngine()
+        self.board = self.active = self.result = None  # own copy of the board, active tiles and the last result
+        self.touched = []
+
+    def reset(self, board: np.ndarray):
+        """
+        Starts tracking the new board - all of its tiles are active
+        :param board: uint8 array [x][y]
+        """
+        self.board = board.copy()
+        self.touched = []
+        self.active = np.ones((-(-board.shape[0] // self.tile_size), -(-board.shape[1] // self.tile_size)), dtype=bool)
+
+    def touch(self, x: int, y: int):
+        if self.active is not None:
+            self.touched.append((x, y))
+            tx, ty = x // self.tile_size, y // self.tile_size
+            self.active[np.ix_(np.arange(tx - 1, tx + 2) % self.active.shape[0],
+                               np.arange(ty - 1, ty + 2) % self.active.shape[1])] = True
+
+    def step(self, board: np.ndarray, generations: int = 1) -> np.ndarray:
+        # board returned last time (only the touched cells could be modified) or completely new board
+        if board is not self.result or self.board.shape != board.shape:
+            self.reset(board)
+        for x, y in self.touched:
+            self.board[x, y] = board[x, y]
+        self.touched = []
+        for _ in range(generations):
+            if self.active.mean() > self.dense_ratio:
+                self.step_dense()
+            else:
+                self.step_tiles()
+        self.result = self.board.copy()
+        return self.result
+
+    def next_generation(self, board: np.ndarray) -> np.ndarray:
+        return self.step(board)
+
+    def step_dense(self):
+        """
+        Computes the whole board at once and activates the tiles with changes and all of their neighbors
+        """
+        board = self.dense.next_generation(self.board)
+        changed = board != self.board
+        width, height = self.active.shape
+        padded = np.zeros((width * self.tile_size, height * self.tile_size), dtype=bool)
+        padded[:changed.shape[0], :changed.shape[1]] = changed
+        changed = padded.reshape(width, self.tile_size, height, self.tile_size).any(axis=(1, 3))
+        self.active = changed.copy()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                self.active |= np.roll(np.roll(changed, dx, axis=0), dy, axis=1)
+        self.board = board
+
+    def step_tiles(self):
+        """
+        Computes only the active tiles, then activates the tiles which could be affected by the changes
+        """
+        width, height = self.board.shape
+        tiles_x, tiles_y = self.active.shape
+        size = self.tile_size
+        updates = []
+        for tx, ty in np.argwhere(self.active).tolist():
+            x0, y0 = tx * size, ty * size
+            x1, y1 = min(x0 + size, width), min(y0 + size, height)
+            # the tile with a frame of one cell (wraps around the edges)
+            tile = self.board[np.ix_(np.arange(x0 - 1, x1 + 1) % width, np.arange(y0 - 1, y1 + 1) % height)]
+            center = tile[1:-1, 1:-1]
+            neighbors = tile[:-2, :-2] + tile[:-2, 1:-1] + tile[:-2, 2:] + tile[1:-1, :-2] + tile[1:-1, 2:] + \
+                        tile[2:, :-2] + tile[2:, 1:-1] + tile[2:, 2:]
+            new = ((neighbors == 3) | (center & (neighbors == 2))).astype(np.uint8)
+            changed = new != center
+            if changed.any():
+                updates.append((tx, ty, new, changed))
+
+        self.active = np.zeros_like(self.active)
+        for tx, ty, new, changed in updates:
+            self.board[tx * size:tx * size + new.shape[0], ty * size:ty * size + new.shape[1]] = new
+            self.active[tx, ty] = True
+            left, right, top, bottom = changed[0].any(), changed[-1].any(), changed[:, 0].any(), changed[:, -1].any()
+            for dx, dy, border in ((-1, 0, left), (1, 0, right), (0, -1, top), (0, 1, bottom),
+                                   (-1, -1, changed[0, 0]), (1, -1, changed[-1, 0]),
+                                   (-1, 1, changed[0, -1]), (1, 1, changed[-1, -1])):
+                if border:
+                    self.active[(tx + dx) % tiles_x, (ty + dy) % tiles_y] = True
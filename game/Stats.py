@@ -0,0 +1,111 @@
+from Settings import np
+from Cycles import zobrist, CycleDetector
+
+
+class Stats:
+    """
+    Statistics of the board maintained incrementally - only the cells which changed their state are counted, so the
+    board doesn't have to be rescanned every frame. When more generations are computed at once, births and deaths are
+    the difference between the boards (a cell born and dead in between is not counted).
+    The Zobrist hash of the board is updated the same way and the cycle detector finds the repeated boards (only when
+    the cycle detection is on, the hash needs the positions of all the changed cells).
+    """
+    FIELDS = ('generation', 'population', 'births', 'deaths', 'changed', 'min_x', 'min_y', 'max_x', 'max_y')
+
+    def __init__(self, board: np.ndarray = None, cycles: bool = True):
+        """
+        :param board: uint8 array [x][y] which is tracked, or None
+        :param cycles: maintain the hash of the board and detect the cycles
+        """
+        self.detect = cycles
+        self.board = None
+        self.generation = self.population = self.births = self.deaths = self.changed = 0
+        self.box = None  # (min_x, min_y, max_x, max_y) of the alive cells, None when it has to be recomputed
+        self.hash = 0
+        self.cycles = CycleDetector()
+        board is not None and self.reset(board)
+
+    def reset(self, board: np.ndarray, generation: int = 0):
+        """
+        Starts tracking the new board - this is the only full scan
+        :param board: uint8 array [x][y]
+        :param generation: generation of the board
+        """
+        self.board = board
+        self.generation = generation
+        self.population = int(board.sum(dtype=np.int64))
+        self.births = self.deaths = self.changed = 0
+        self.box = None
+        self.cycles.reset()
+        if self.detect:
+            self.hash = zobrist(np.flatnonzero(board))
+            self.cycles.add(generation, self.hash)
+
+    def step(self, old: np.ndarray, new: np.ndarray, generations: int = 1, diff: np.ndarray = None) -> bool:
+        """
+        Updates the statistics after the generation change
+        :param old: board before the generation change
+        :param new: board after the generation change
+        :param generations: number of generations between the boards
+        :param diff: old ^ new when it was already computed (it is shared with the renderer)
+        :return: True when the board has stabilized just now (see stabilized and period of the cycles)
+        """
+        diff = old ^ new if diff is None else diff
+        born = diff & new
+        self.changed, self.births = int(np.count_nonzero(diff)), int(np.count_nonzero(born))
+        self.deaths = self.changed - self.births
+        self.population += self.births - self.deaths
+        self.generation += generations
+        self.board = new
+
+        if self.box is not None:
+            min_x, min_y, max_x, max_y = self.box
+            # the box could shrink only when some cell on its edge died (the edges are the only rows read)
+            died = lambda cells, board: (cells & board).any()
+            if died(diff[min_x], old[min_x]) or died(diff[max_x], old[max_x]) or \
+                    died(diff[:, min_y], old[:, min_y]) or died(diff[:, max_y], old[:, max_y]):
+                self.box = None
+            elif self.births:
+                xs = np.flatnonzero(born.any(axis=1))
+                ys = np.flatnonzero(born[xs[0]:xs[-1] + 1].any(axis=0))
+                self.box = (min(min_x, xs[0]), min(min_y, ys[0]), max(max_x, xs[-1]), max(max_y, ys[-1]))
+
+        if not self.detect:
+            return False
+        self.hash ^= zobrist(np.flatnonzero(diff.view(bool))) if self.changed else 0
+        return self.cycles.add(self.generation, self.hash)
+
+    def set_cell(self, x: int, y: int, alive: bool):
+        """
+        Called when the state of the cell was changed outside of the engine (mouse)
+        """
+        self.population += 1 if alive else -1
+        self.cycles.reset()
+        if self.detect:
+            self.hash ^= zobrist([x * self.board.shape[1] + y])
+            self.cycles.add(self.generation, self.hash)
+        if self.box is not None:
+            min_x, min_y, max_x, max_y = self.box
+            if alive:
+                self.box = (min(min_x, x), min(min_y, y), max(max_x, x), max(max_y, y))
+            elif x in (min_x, max_x) or y in (min_y, max_y):
+                self.box = None
+
+    def bounding_box(self) -> (int, int, int, int):
+        """
+        Returns the smallest rectangle containing all the alive cells
+        :return: (min_x, min_y, max_x, max_y) or None when there are no alive cells
+        """
+        if not self.population:
+            return None
+        if self.box is None:
+            xs, ys = np.flatnonzero(self.board.any(axis=1)), np.flatnonzero(self.board.any(axis=0))
+            self.box = (int(xs[0]), int(ys[0]), int(xs[-1]), int(ys[-1]))
+        return tuple(int(i) for i in self.box)
+
+    def row(self) -> dict:
+        """
+        Returns all the statistics as a dictionary with the keys FIELDS
+        """
+        box = self.bounding_box() or (None,) * 4
+        return dict(zip(self.FIELDS, (self.generation, self.population, self.births, self.deaths, self.changed) + box))
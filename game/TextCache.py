@@ -0,0 +1,31 @@
+from Settings import pg, TEXT_CACHE_SIZE
+
+
+class TextCache:
+    """
+    Renders the texts with the font and keeps the surfaces keyed by their content, so the text which doesn't change
+    is rendered only once.
+    A new cache has to be created when the font changes.
+    """
+
+    def __init__(self, font: pg.font.Font, size: int = TEXT_CACHE_SIZE):
+        """
+        :param font: font used to render the texts
+        :param size: maximum number of cached texts, the cache is cleared when it is exceeded
+        """
+        self.font = font
+        self.size = size
+        self.texts = {}
+
+    def render(self, text: str, color, background=None) -> pg.Surface:
+        """
+        Returns the rendered text (the same surface for the same arguments)
+        """
+        key = (text, color, background)
+        surface = self.texts.get(key)
+        if surface is None:
+            if len(self.texts) >= self.size:
+                self.texts.clear()
+            surface = self.texts[key] = self.font.render(text, False, color, background)
+        return surface
+
@@ -1,6 +1,34 @@
-from GameOfLife import GameOfLife
 from ArgsParser import ArgsParser
 
-args = ArgsParser()
-GameOfLife(cell_size=args.size, fps=args.fps, gens_per_sec=args.gens, width=args.width, height=args.height,
-           file=args.file).run()
+if __name__ == '__main__':  # the workers of the parallel engine import this module as well
+    args = ArgsParser()
+    if args.benchmark:
+        from Benchmark import Benchmark
+        Benchmark(seed=args.seed or 0, baseline=args.baseline, update_baseline=args.update_baseline,
+                  tolerance=args.tolerance, workers=args.workers).run()
+    elif args.soups:
+        from SoupSearch import SoupSearch
+        SoupSearch(args.soups, universe=args.universe, generations=args.generations, seed=args.seed or 0,
+                   batch=args.batch, workers=args.workers, output=args.output).run()
+    elif args.out_of_core:
+        from OutOfCore import OutOfCore
+        OutOfCore(args.out_of_core, universe=args.universe, pattern=args.file, seed=args.seed, band=args.band,
+                  snapshots=args.snapshots).run(args.generations)
+    elif args.headless:
+        from Headless import Headless
+        headless = Headless(cell_size=args.size, width=args.width, height=args.height, file=args.file,
+                            universe=args.universe, engine=args.engine, generations=args.generations,
+                            seed=args.seed, workers=args.workers, stats_file=args.stats,
+                            output=args.output, cycles=args.cycles, record=args.record, stride=args.stride,
+                            backpressure=args.backpressure)
+        if args.startup:
+            headless.startup()
+        else:
+            headless.scale(args.workers) if args.scale else headless.run()
+    else:
+        from GameOfLife import GameOfLife
+        GameOfLife(cell_size=args.size, fps=args.fps, gens_per_sec=args.gens, width=args.width, height=args.height,
+                   file=args.file, universe=args.universe, engine=args.engine, dirty=args.dirty,
+                   workers=args.workers, turbo=args.turbo, background=args.background,
+                   auto_pause=args.autopause, profile_file=args.profile, history=args.history, record=args.record,
+                   stride=args.stride, backpressure=args.backpressure).run()